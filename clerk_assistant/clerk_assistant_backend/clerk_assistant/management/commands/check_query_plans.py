@@ -0,0 +1,179 @@
+import re
+import uuid
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from clerk_assistant.models import (
+    Analysis,
+    AnalysisProgress,
+    Discrepancy,
+    Document,
+    DocumentType,
+    OCRResult,
+    Recommendation,
+)
+from clerk_assistant.views import _related_count
+
+
+FIXTURE_ALIAS = 'query_plan_fixture'
+STATUSES = [status for status, _ in Analysis.STATUS_CHOICES]
+
+
+def _fixture_connection():
+    """In-memory SQLite database with the app schema, next to the configured one."""
+    connections.settings[FIXTURE_ALIAS] = {
+        **connections.settings[DEFAULT_DB_ALIAS],
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'OPTIONS': {},
+    }
+    connection = connections[FIXTURE_ALIAS]
+    with connection.schema_editor() as editor:
+        for model in apps.get_app_config('clerk_assistant').get_models():
+            editor.create_model(model)
+    return connection
+
+
+def _seed(analyses: int, documents: int) -> None:
+    db = FIXTURE_ALIAS
+    document_type = DocumentType.objects.using(db).create(name='Karta wypadku')
+    
+    analysis_rows = [
+        Analysis(status=STATUSES[i % len(STATUSES)], business_description='')
+        for i in range(analyses)
+    ]
+    Analysis.objects.using(db).bulk_create(analysis_rows)
+    
+    document_rows, discrepancy_rows, recommendation_rows, progress_rows = [], [], [], []
+    for analysis in analysis_rows:
+        progress_rows.append(AnalysisProgress(analysis=analysis))
+        discrepancy_rows.append(Discrepancy(analysis=analysis, description='x'))
+        recommendation_rows.append(
+            Recommendation(analysis=analysis, document_type=document_type, reason='x')
+        )
+        for _ in range(documents):
+            document_rows.append(Document(
+                analysis=analysis,
+                file='documents/fixture.pdf',
+                filename='fixture.pdf',
+                file_size=1,
+                content_hash=uuid.uuid4().hex * 2,
+            ))
+    Document.objects.using(db).bulk_create(document_rows)
+    OCRResult.objects.using(db).bulk_create(
+        [OCRResult(document=document, extracted_text='x') for document in document_rows]
+    )
+    Discrepancy.objects.using(db).bulk_create(discrepancy_rows)
+    Recommendation.objects.using(db).bulk_create(recommendation_rows)
+    AnalysisProgress.objects.using(db).bulk_create(progress_rows)
+    
+    with connections[db].cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+# Per-analysis COUNT(*) subqueries of the list endpoint, answered from the
+# analysis foreign key indexes without reading the rows
+LIST_COUNT_INDEXES = [
+    'COVERING INDEX clerk_assistant_document_analysis_id',
+    'COVERING INDEX clerk_assistant_discrepancy_analysis_id',
+    'COVERING INDEX clerk_assistant_recommendation_analysis_id',
+]
+
+
+def _hot_queries():
+    """(name, queryset, plan fragments that must appear) for the pipeline hot paths."""
+    db = FIXTURE_ALIAS
+    analysis = Analysis.objects.using(db).order_by('created_at').first()
+    document = Document.objects.using(db).filter(analysis=analysis).first()
+    analyses = Analysis.objects.using(db).annotate(
+        documents_count=_related_count(Document),
+        discrepancies_count=_related_count(Discrepancy),
+        recommendations_count=_related_count(Recommendation),
+    )
+    
+    return [
+        ('analysis list', analyses.order_by('-created_at')[:20],
+         ['analysis_created_idx', *LIST_COUNT_INDEXES]),
+        ('analysis list by status',
+         analyses.filter(status__in=['failed']).order_by('-created_at')[:20],
+         ['analysis_status_created_idx', *LIST_COUNT_INDEXES]),
+        # The unique index of the one-to-one analysis field serves both polls
+        ('status poll ETag',
+         AnalysisProgress.objects.using(db).filter(analysis=analysis).values_list('version', flat=True)[:1],
+         ['sqlite_autoindex_clerk_assistant_analysisprogress']),
+        ('status poll', AnalysisProgress.objects.using(db).filter(analysis=analysis).order_by('pk')[:1],
+         ['sqlite_autoindex_clerk_assistant_analysisprogress']),
+        ('stage OCR results',
+         OCRResult.objects.using(db).filter(document__analysis=analysis).select_related('document'),
+         []),
+        ('stage discrepancies', Discrepancy.objects.using(db).filter(analysis=analysis), []),
+        ('stage recommendations', Recommendation.objects.using(db).filter(analysis=analysis), []),
+        ('document by content hash',
+         Document.objects.using(db).filter(content_hash=document.content_hash).order_by(),
+         ['document_content_hash_idx']),
+    ]
+
+
+def _plan_problems(plan: str, expected: list[str]) -> list[str]:
+    problems = []
+    for line in plan.splitlines():
+        # SQLite rows are "<id> <parent> <notused> <detail>"
+        step = re.sub(r'^\d+ \d+ \d+ ', '', line.strip())
+        # A SCAN reads the whole table or index, a temp B-tree sorts it. Only
+        # walking an expected index is fine: the list reads it in order up to LIMIT
+        scan = re.match(r'SCAN \S+(?: USING (?:COVERING )?INDEX (\S+))?', step)
+        if scan and not (scan.group(1) and any(scan.group(1) in fragment for fragment in expected)):
+            problems.append(f"full table scan: {step}")
+        if 'TEMP B-TREE FOR ORDER BY' in step:
+            problems.append(f"sort without index: {step}")
+    for fragment in expected:
+        if fragment not in plan:
+            problems.append(f"{fragment} not used")
+    return problems
+
+
+def _check_checker() -> None:
+    """Fail loudly if the checker would pass a query that has no index at all."""
+    unindexed = Analysis.objects.using(FIXTURE_ALIAS).filter(business_description='x')
+    if not any(p.startswith('full table scan') for p in _plan_problems(unindexed.explain(), [])):
+        raise CommandError("Plan checker did not detect a full table scan, "
+                           "the EXPLAIN output format is not recognised")
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that the pipeline hot queries are answered from indexes, using "
+        "EXPLAIN QUERY PLAN on an in-memory SQLite copy of the schema."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--analyses', type=int, default=500,
+                            help='Number of fixture analyses (default: 500)')
+        parser.add_argument('--documents', type=int, default=3,
+                            help='Documents per fixture analysis (default: 3)')
+    
+    def handle(self, *args, **options):
+        _fixture_connection()
+        try:
+            _seed(options['analyses'], options['documents'])
+            _check_checker()
+            
+            failed = 0
+            for name, queryset, expected in _hot_queries():
+                plan = queryset.explain()
+                problems = _plan_problems(plan, expected)
+                if problems:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f"FAIL {name}: {'; '.join(problems)}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"ok   {name}"))
+                if options['verbosity'] > 1 or problems:
+                    self.stdout.write(plan)
+        finally:
+            connections[FIXTURE_ALIAS].close()
+            del connections.settings[FIXTURE_ALIAS]
+        
+        if failed:
+            raise CommandError(f"{failed} hot queries are not served by an index")
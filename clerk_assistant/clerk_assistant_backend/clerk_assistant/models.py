@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 import uuid
 
 class DocumentType(models.Model):
@@ -47,12 +48,24 @@ class Analysis(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Analyses'
+        indexes = [
+            # List endpoint: newest first, optionally filtered by status
+            models.Index(fields=['-created_at'], name='analysis_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='analysis_status_created_idx'),
+        ]
 
 
 class Document(models.Model):
     """
     Uploaded PDF documents.
     """
+    SOURCE_UPLOAD = 'upload'
+    SOURCE_USER_ASSISTANT = 'user_assistant'
+    SOURCE_CHOICES = [
+        (SOURCE_UPLOAD, 'Upload'),
+        (SOURCE_USER_ASSISTANT, 'User assistant session'),
+    ]
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     analysis = models.ForeignKey(Analysis, on_delete=models.CASCADE, related_name='documents')
     document_type = models.ForeignKey(DocumentType, on_delete=models.PROTECT, null=True, blank=True)
@@ -62,11 +75,21 @@ class Document(models.Model):
     uploaded_at = models.DateTimeField(auto_now_add=True)
     file_size = models.IntegerField()
     
+    # SHA-256 of the file and page count, recorded while the upload streams in
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+    page_count = models.IntegerField(null=True, blank=True)
+    
+    # Imported sessions arrive with OCR result and extraction already stored
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default=SOURCE_UPLOAD)
+    
     def __str__(self):
         return f"{self.filename} ({self.document_type})"
     
     class Meta:
         ordering = ['uploaded_at']
+        indexes = [
+            models.Index(fields=['content_hash'], name='document_content_hash_idx'),
+        ]
 
 
 class OCRResult(models.Model):
@@ -79,10 +102,98 @@ class OCRResult(models.Model):
     confidence_score = models.FloatField(null=True, blank=True)
     processed_at = models.DateTimeField(auto_now_add=True)
     
+    # Start offset of each page in extracted_text, for serving text page by page
+    page_offsets = models.JSONField(default=list, blank=True)
+    
     def __str__(self):
         return f"OCR for {self.document.filename}"
 
 
+class OCRCacheEntry(models.Model):
+    """
+    OCR output shared across analyses, keyed by SHA-256 of the PDF bytes.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    content_hash = models.CharField(max_length=64, unique=True)
+    extracted_text = models.TextField()
+    confidence_score = models.FloatField(null=True, blank=True)
+    page_count = models.IntegerField(default=0)
+    page_offsets = models.JSONField(default=list, blank=True)
+    
+    # Set while a worker runs OCR for this hash; other workers wait for it
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    
+    # Usage stats, also drive TTL/size eviction
+    hit_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"OCR cache {self.content_hash[:12]} ({self.hit_count} hits)"
+    
+    class Meta:
+        verbose_name_plural = 'OCR cache entries'
+
+
+class DocumentExtraction(models.Model):
+    """
+    Structured fields extracted from an OCR result for discrepancy detection.
+    Reused while both the OCR text and the extraction prompt are unchanged.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ocr_result = models.OneToOneField(OCRResult, on_delete=models.CASCADE, related_name='extraction')
+    
+    text_hash = models.CharField(max_length=64)
+    prompt_version = models.CharField(max_length=64)
+    data = models.JSONField(default=dict)
+    
+    extracted_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Extraction for {self.ocr_result.document.filename}"
+
+
+class AnalysisDocumentsContext(models.Model):
+    """
+    Normalized documents of an analysis and their combined text, built once
+    after OCR and shared by the LLM stages.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    analysis = models.OneToOneField(Analysis, on_delete=models.CASCADE, related_name='documents_context')
+    
+    documents = models.JSONField(default=list)
+    combined_text = models.TextField()
+    content_hash = models.CharField(max_length=64)
+    
+    built_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Documents context for {self.analysis.id}"
+
+
+class AnalysisProgress(models.Model):
+    """
+    Denormalized pipeline progress of an analysis, written by the Celery
+    tasks so status polling reads a single row.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    analysis = models.OneToOneField(Analysis, on_delete=models.CASCADE, related_name='progress')
+    
+    # stage -> {"state", "started_at", "finished_at", "count"}
+    stages = models.JSONField(default=dict)
+    documents_count = models.IntegerField(default=0)
+    
+    # Bumped on every write, part of the status ETag
+    version = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Progress of {self.analysis_id} (v{self.version})"
+    
+    class Meta:
+        verbose_name_plural = 'Analysis progress'
+
+
 class Discrepancy(models.Model):
     """
     Inconsistencies detected across all documents in the analysis.
@@ -0,0 +1,11 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class AnalysisPagination(PageNumberPagination):
+    """
+    Page-number pagination for the analyses list.
+    GET /api/analyses/?page=2&page_size=50
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -25,16 +25,24 @@ class DocumentTypeSerializer(serializers.ModelSerializer):
 class OCRResultSerializer(serializers.ModelSerializer):
     """
     Read-only serializer for OCR results.
+    
+    The extracted text itself is not included; it is served page by page
+    from the document's text endpoint (see DocumentSerializer.ocr_text_url).
     """
+    page_count = serializers.SerializerMethodField()
+    
     class Meta:
         model = OCRResult
         fields = [
             'id',
-            'extracted_text',
             'confidence_score',
+            'page_count',
             'processed_at'
         ]
         read_only_fields = fields
+    
+    def get_page_count(self, obj):
+        return len(obj.page_offsets) or 1
 
 
 class DocumentSerializer(serializers.ModelSerializer):
@@ -43,6 +51,7 @@ class DocumentSerializer(serializers.ModelSerializer):
     """
     document_type = DocumentTypeSerializer(read_only=True)
     ocr_result = OCRResultSerializer(read_only=True)
+    ocr_text_url = serializers.SerializerMethodField()
     
     class Meta:
         model = Document
@@ -53,9 +62,21 @@ class DocumentSerializer(serializers.ModelSerializer):
             'filename',
             'uploaded_at',
             'file_size',
-            'ocr_result'
+            'page_count',
+            'content_hash',
+            'source',
+            'ocr_result',
+            'ocr_text_url'
         ]
         read_only_fields = fields
+    
+    def get_ocr_text_url(self, obj):
+        if not hasattr(obj, 'ocr_result'):
+            return None
+        
+        url = f'/api/analyses/{obj.analysis_id}/documents/{obj.id}/text/'
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
 
 class DiscrepancySerializer(serializers.ModelSerializer):
@@ -140,7 +161,43 @@ class DraftDocumentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'file', 'generated_at', 'file_size']
 
 
-class AnalysisSerializer(serializers.ModelSerializer):
+class ExpandableFieldsMixin:
+    """
+    Lets clients choose what an Analysis representation contains.
+    
+    `expand` (from ?expand=) lists the nested sections to include; sections
+    not listed are dropped before serialization, so their queries are never
+    run. `fields` (from ?fields=) limits the top-level fields. Both come from
+    the serializer context; without them `default_expand` applies.
+    """
+    expandable_fields = [
+        'documents',
+        'discrepancies',
+        'formal_analysis',
+        'recommendations',
+        'opinion',
+        'drafts',
+    ]
+    default_expand = expandable_fields
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        expand = self.context.get('expand')
+        if expand is None:
+            expand = self.default_expand
+        for field_name in self.expandable_fields:
+            if field_name not in expand:
+                self.fields.pop(field_name, None)
+        
+        requested_fields = self.context.get('fields')
+        if requested_fields:
+            for field_name in list(self.fields):
+                if field_name not in requested_fields:
+                    self.fields.pop(field_name)
+
+
+class AnalysisSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Analysis with writable Work Connection fields.
     Includes nested relationships for complete analysis view.
@@ -187,3 +244,36 @@ class AnalysisSerializer(serializers.ModelSerializer):
             'opinion',
             'drafts'
         ]
+
+
+class AnalysisListSerializer(AnalysisSerializer):
+    """
+    Slim Analysis representation for listing: no nested sections unless
+    requested with ?expand=, only their counts.
+    """
+    documents_count = serializers.IntegerField(read_only=True)
+    discrepancies_count = serializers.IntegerField(read_only=True)
+    recommendations_count = serializers.IntegerField(read_only=True)
+    
+    default_expand = []
+    
+    class Meta(AnalysisSerializer.Meta):
+        fields = AnalysisSerializer.Meta.fields + [
+            'documents_count',
+            'discrepancies_count',
+            'recommendations_count',
+        ]
+        read_only_fields = AnalysisSerializer.Meta.read_only_fields + [
+            'documents_count',
+            'discrepancies_count',
+            'recommendations_count',
+        ]
+
+
+class SessionImportSerializer(serializers.Serializer):
+    """
+    Input for importing a finished user-assistant session into an analysis.
+    """
+    data_type = serializers.ChoiceField(choices=['accident', 'report', 'statement'])
+    session_id = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    collected_data = serializers.DictField()
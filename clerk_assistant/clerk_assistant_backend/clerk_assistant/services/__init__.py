@@ -1,14 +1,21 @@
 from .ocr_service import process_ocr, process_ocr_sync
+from .ocr_cache import evict_ocr_cache
+from .llm_cache import get_llm_cache, evict_llm_cache, get_llm_cache_stats
 from .discrepancy_service import detect_discrepancies, detect_discrepancies_sync
 from .formal_analysis_service import perform_formal_analysis, perform_formal_analysis_sync
 from .recommendation_service import analyze_documentation_requirements, analyze_documentation_requirements_sync
 from .opinion_service import generate_legal_opinion, generate_legal_opinion_sync
 from .llm_utils import get_azure_llm, prepare_documents_context, prepare_combined_documents_text
+from .context_builder import build_documents_context, count_tokens
+from .documents_context import build_analysis_documents_context, get_analysis_documents_context
+from .session_import import import_user_assistant_session
+from .progress import record_stage, record_stage_result, get_analysis_progress
 
 __all__ = [
     # OCR Processing
     'process_ocr',
     'process_ocr_sync',
+    'evict_ocr_cache',
     # Discrepancy Detection
     'detect_discrepancies',
     'detect_discrepancies_sync',
@@ -25,4 +32,18 @@ __all__ = [
     'get_azure_llm',
     'prepare_documents_context',
     'prepare_combined_documents_text',
+    'build_documents_context',
+    'count_tokens',
+    # LLM Response Cache
+    'get_llm_cache',
+    'evict_llm_cache',
+    'get_llm_cache_stats',
+    'build_analysis_documents_context',
+    'get_analysis_documents_context',
+    # User-assistant Session Import
+    'import_user_assistant_session',
+    # Progress Tracking
+    'record_stage',
+    'record_stage_result',
+    'get_analysis_progress',
 ]
@@ -0,0 +1,130 @@
+import re
+import unicodedata
+from datetime import date
+from typing import Optional
+
+
+POLISH_MONTHS = {
+    "stycznia": 1, "styczeń": 1, "styczen": 1, "sty": 1,
+    "lutego": 2, "luty": 2, "lut": 2,
+    "marca": 3, "marzec": 3, "mar": 3,
+    "kwietnia": 4, "kwiecień": 4, "kwiecien": 4, "kwi": 4,
+    "maja": 5, "maj": 5,
+    "czerwca": 6, "czerwiec": 6, "cze": 6,
+    "lipca": 7, "lipiec": 7, "lip": 7,
+    "sierpnia": 8, "sierpień": 8, "sierpien": 8, "sie": 8,
+    "września": 9, "wrzesień": 9, "wrzesnia": 9, "wrzesien": 9, "wrz": 9,
+    "października": 10, "październik": 10, "pazdziernika": 10, "pazdziernik": 10, "paź": 10, "paz": 10,
+    "listopada": 11, "listopad": 11, "lis": 11,
+    "grudnia": 12, "grudzień": 12, "grudzien": 12, "gru": 12,
+}
+
+PESEL_WEIGHTS = (1, 3, 7, 9, 1, 3, 7, 9, 1, 3)
+NIP_WEIGHTS = (6, 5, 7, 2, 3, 4, 5, 6, 7)
+
+
+def normalize_whitespace(value: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", value or "").strip()
+
+
+def strip_diacritics(value: str) -> str:
+    normalized = unicodedata.normalize("NFKD", value.replace("ł", "l").replace("Ł", "L"))
+    return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Case- and whitespace-insensitive form used as a last-resort comparison key."""
+    return normalize_whitespace(value).casefold().rstrip(".")
+
+
+def normalize_digits(value: Optional[str]) -> str:
+    return re.sub(r"\D", "", value or "")
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    """
+    Parse dates in the formats used in accident documents.
+
+    Handles DD.MM.YYYY, DD-MM-YYYY, DD/MM/YYYY, YYYY-MM-DD and
+    "12 marca 2024 r." style dates.
+
+    Returns:
+        Parsed date or None if the value isn't recognized
+    """
+    text = normalize_text(value)
+    if not text:
+        return None
+
+    match = re.search(r"\b(\d{4})[-./](\d{1,2})[-./](\d{1,2})\b", text)
+    if match:
+        return _safe_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+    match = re.search(r"\b(\d{1,2})[-./](\d{1,2})[-./](\d{4})\b", text)
+    if match:
+        return _safe_date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+
+    match = re.search(r"\b(\d{1,2})\s+([^\W\d_]+)\.?\s+(\d{4})\b", text)
+    if match and match.group(2) in POLISH_MONTHS:
+        return _safe_date(int(match.group(3)), POLISH_MONTHS[match.group(2)], int(match.group(1)))
+
+    return None
+
+
+def normalize_time(value: Optional[str]) -> Optional[str]:
+    """
+    Normalize a time of day to HH:MM.
+
+    Handles "8:30", "08.30", "8 30", "godz. 8" and similar forms.
+    """
+    text = normalize_text(value)
+    if not text:
+        return None
+
+    match = re.search(r"\b(\d{1,2})(?:\s*[:.\s]\s*(\d{2}))?\b", text)
+    if not match:
+        return None
+
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    if hour > 23 or minute > 59:
+        return None
+
+    return f"{hour:02d}:{minute:02d}"
+
+
+def normalize_person_name(value: Optional[str]) -> str:
+    """
+    Order- and diacritics-insensitive name key, so "Łukasz Nowak" and
+    "NOWAK Lukasz" match.
+    """
+    tokens = re.findall(r"[^\W\d_]+(?:-[^\W\d_]+)*", strip_diacritics(normalize_text(value)))
+    return " ".join(sorted(tokens))
+
+
+def _checksum(digits: str, weights: tuple) -> int:
+    return sum(int(d) * w for d, w in zip(digits, weights))
+
+
+def is_valid_pesel(value: Optional[str]) -> bool:
+    digits = normalize_digits(value)
+    if len(digits) != 11:
+        return False
+
+    control = (10 - _checksum(digits, PESEL_WEIGHTS) % 10) % 10
+    return control == int(digits[10])
+
+
+def is_valid_nip(value: Optional[str]) -> bool:
+    digits = normalize_digits(value)
+    if len(digits) != 10:
+        return False
+
+    control = _checksum(digits, NIP_WEIGHTS) % 11
+    return control != 10 and control == int(digits[9])
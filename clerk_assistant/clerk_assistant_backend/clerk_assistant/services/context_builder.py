@@ -0,0 +1,217 @@
+import math
+import logging
+from functools import lru_cache
+from typing import Optional
+
+from django.conf import settings
+
+from .comparison_utils import strip_diacritics
+from .llm_utils import format_combined_documents_text
+
+logger = logging.getLogger(__name__)
+
+
+# Keyword stems per work accident criterion, matched against lowercased text without diacritics
+CRITERIA_KEYWORDS = {
+    "naglosc": [
+        "nagl", "natychmiast", "upad", "poslizg", "potkn", "uderz", "wybuch",
+        "zderz", "spadl", "przewroc", "zdarzen",
+    ],
+    "przyczyna_zewnetrzna": [
+        "przyczyn", "maszyn", "urzadzen", "narzedz", "slisk", "spad", "prad",
+        "temperatur", "substancj", "drabin", "schod", "pojazd",
+    ],
+    "uraz": [
+        "uraz", "obrazen", "zlaman", "stlucz", "skalecz", "zwichn", "oparzen",
+        "rozpozn", "szpital", "lekar", "diagnoz", "niezdolnos",
+    ],
+    "zwiazek_z_praca": [
+        "prac", "dzialalnos", "zleceni", "klient", "czynnos", "obowiazk",
+        "umow", "firm", "godzin", "stanowisk",
+    ],
+    # Mentions of supporting documents matter when deciding what is missing
+    "dokumentacja": [
+        "zaswiadcz", "zwolnien", "swiadk", "protokol", "notatk", "karta",
+        "dokumentacj", "policj", "inspekcj", "zalacz",
+    ],
+}
+
+STAGE_CRITERIA = {
+    "formal_analysis": ["naglosc", "przyczyna_zewnetrzna", "uraz", "zwiazek_z_praca"],
+    "recommendations": ["naglosc", "przyczyna_zewnetrzna", "uraz", "zwiazek_z_praca", "dokumentacja"],
+    "opinion": ["naglosc", "przyczyna_zewnetrzna", "uraz", "zwiazek_z_praca"],
+}
+
+OMISSION_MARKER = "[...]"
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, estimating tokens from length: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens the way gpt-4o does, or estimate ~4 chars per token
+    when tiktoken is not available.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _split_long_line(line: str, chunk_tokens: int) -> list[str]:
+    parts, current, current_tokens = [], [], 0
+    for word in line.split(" "):
+        word_tokens = count_tokens(word + " ")
+        if current and current_tokens + word_tokens > chunk_tokens:
+            parts.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += word_tokens
+    if current:
+        parts.append(" ".join(current))
+    return parts
+
+
+def chunk_text(text: str, chunk_tokens: int) -> list[tuple[str, int]]:
+    """
+    Split text into line-aligned chunks of at most `chunk_tokens` tokens.
+
+    Returns:
+        List of (chunk text, token count) in original order
+    """
+    chunks = []
+    current, current_tokens = [], 0
+
+    for line in (text or "").split("\n"):
+        line_tokens = count_tokens(line + "\n")
+        pieces = [(line, line_tokens)]
+        if line_tokens > chunk_tokens:
+            pieces = [(piece, count_tokens(piece + "\n")) for piece in _split_long_line(line, chunk_tokens)]
+
+        for piece, piece_tokens in pieces:
+            if current and current_tokens + piece_tokens > chunk_tokens:
+                chunks.append(("\n".join(current), current_tokens))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+
+    if current:
+        chunks.append(("\n".join(current), current_tokens))
+
+    return chunks
+
+
+def score_chunk(text: str, stage: str) -> float:
+    """Keyword hits for the stage's criteria per 100 tokens."""
+    normalized = strip_diacritics(text.casefold())
+    hits = 0
+    for criterion in STAGE_CRITERIA.get(stage, list(CRITERIA_KEYWORDS)):
+        # Each criterion counts at most a few times so one topic can't dominate
+        hits += min(3, sum(normalized.count(stem) for stem in CRITERIA_KEYWORDS[criterion]))
+    return hits * 100 / max(count_tokens(text), 1)
+
+
+def _document_header(index: int, document: dict) -> str:
+    return (f"\n=== DOKUMENT {index}: {document['document_name']} ===\n"
+            f"Typ dokumentu: {document['document_type']}\n\n")
+
+
+def _document_footer(index: int) -> str:
+    return f"\n\n--- Koniec dokumentu {index} ---\n"
+
+
+def build_documents_context(
+    documents: list[dict],
+    stage: str,
+    max_tokens: Optional[int] = None,
+    reserved_tokens: int = 0,
+    combined_text: Optional[str] = None,
+) -> str:
+    """
+    Build the documents section of a prompt within a token budget.
+
+    Falls back to the full combined text when it fits. Otherwise documents
+    are chunked and, besides the opening chunk of every document, the
+    chunks most relevant to the stage's criteria (nagłość, przyczyna
+    zewnętrzna, uraz, związek z pracą) are kept, in original order.
+
+    Args:
+        documents: Document dictionaries as returned by prepare_documents_context
+        stage: Pipeline stage name, selects the relevance criteria
+        max_tokens: Budget for the whole prompt input (defaults to LLM_CONTEXT_MAX_TOKENS)
+        reserved_tokens: Tokens already taken by other parts of the prompt
+        combined_text: Precomputed format_combined_documents_text output, if available
+
+    Returns:
+        Combined formatted string in the format_combined_documents_text layout
+    """
+    if max_tokens is None:
+        max_tokens = getattr(settings, "LLM_CONTEXT_MAX_TOKENS", 30000)
+    budget = max_tokens - reserved_tokens
+
+    full_text = combined_text if combined_text is not None else format_combined_documents_text(documents)
+    full_tokens = count_tokens(full_text)
+    if full_tokens <= budget:
+        return full_text
+
+    chunk_tokens = getattr(settings, "LLM_CONTEXT_CHUNK_TOKENS", 400)
+    marker_tokens = count_tokens(OMISSION_MARKER + "\n")
+
+    chunked = []
+    remaining = budget
+    for i, document in enumerate(documents, 1):
+        header, footer = _document_header(i, document), _document_footer(i)
+        remaining -= count_tokens(header) + count_tokens(footer)
+        chunked.append((header, footer, chunk_text(document["document_content"], chunk_tokens)))
+
+    selected = set()
+
+    def _try_select(doc_idx: int, chunk_idx: int) -> None:
+        nonlocal remaining
+        cost = chunked[doc_idx][2][chunk_idx][1] + marker_tokens
+        if cost <= remaining:
+            selected.add((doc_idx, chunk_idx))
+            remaining -= cost
+
+    # Opening chunk of each document usually carries dates, names and the document's purpose
+    for doc_idx, (_, _, chunks) in enumerate(chunked):
+        if chunks:
+            _try_select(doc_idx, 0)
+
+    candidates = sorted(
+        (
+            (-score_chunk(text, stage), doc_idx, chunk_idx)
+            for doc_idx, (_, _, chunks) in enumerate(chunked)
+            for chunk_idx, (text, _) in enumerate(chunks)
+            if chunk_idx > 0
+        )
+    )
+    for _, doc_idx, chunk_idx in candidates:
+        _try_select(doc_idx, chunk_idx)
+
+    parts = []
+    for doc_idx, (header, footer, chunks) in enumerate(chunked):
+        body = []
+        for chunk_idx, (text, _) in enumerate(chunks):
+            if (doc_idx, chunk_idx) in selected:
+                body.append(text)
+            elif not body or body[-1] != OMISSION_MARKER:
+                body.append(OMISSION_MARKER)
+        parts.append(header + "\n".join(body) + footer)
+
+    context = "\n".join(parts)
+    logger.info(f"Documents context for {stage} reduced from {full_tokens} to "
+               f"~{count_tokens(context)} tokens ({len(selected)} of "
+               f"{sum(len(d[2]) for d in chunked)} chunks, budget {budget})")
+
+    return context
@@ -1,12 +1,25 @@
 import json
+import hashlib
 import logging
 from typing import Optional
 
+from django.conf import settings
+from django.db import transaction
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 
 from .llm_utils import get_azure_llm, prepare_documents_context
+from .comparison_utils import (
+    is_valid_nip,
+    is_valid_pesel,
+    normalize_digits,
+    normalize_person_name,
+    normalize_text,
+    normalize_time,
+    normalize_whitespace,
+    parse_date,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -87,13 +100,15 @@ Twoim zadaniem jest porównanie danych wyodrębnionych z wielu dokumentów i wyk
 
 ## Kategorie do porównania:
 
-1. **Data i godzina wypadku** - czy wszystkie dokumenty podają tę samą datę i godzinę
-2. **Miejsce wypadku** - adres, nazwa zakładu, stanowisko pracy
-3. **Dane poszkodowanego** - imię, nazwisko, PESEL, adres, stanowisko
-4. **Dane świadków** - czy ci sami świadkowie występują w dokumentach
-5. **Okoliczności wypadku** - opis przebiegu zdarzenia
-6. **Przyczyny wypadku** - wskazane przyczyny
-7. **Obrażenia** - rodzaj i zakres obrażeń
+1. **Miejsce wypadku** - adres, nazwa zakładu, stanowisko pracy
+2. **Dane poszkodowanego** - adres, stanowisko
+3. **Dane świadków** - czy ci sami świadkowie występują w dokumentach
+4. **Okoliczności wypadku** - opis przebiegu zdarzenia
+5. **Przyczyny wypadku** - wskazane przyczyny
+6. **Obrażenia** - rodzaj i zakres obrażeń
+
+Data i godzina wypadku, imię i nazwisko poszkodowanego, PESEL oraz NIP pracodawcy
+są porównywane automatycznie i nie występują w przekazanych danych - nie oceniaj ich.
 
 ## Klasyfikacja wagi rozbieżności:
 
@@ -127,7 +142,7 @@ Przeanalizuj krok po kroku:
 Zwróć wyniki w formacie JSON."""
 
 
-def _extract_document_data(llm, document: dict) -> ExtractedDocumentData:
+def _build_extraction_chain(llm):
     extraction_prompt = ChatPromptTemplate.from_messages([
         ("system", EXTRACTION_SYSTEM_PROMPT),
         ("human", EXTRACTION_USER_PROMPT),
@@ -135,15 +150,43 @@ def _extract_document_data(llm, document: dict) -> ExtractedDocumentData:
     
     parser = JsonOutputParser(pydantic_object=ExtractedDocumentData)
     
-    chain = extraction_prompt | llm | parser
+    return extraction_prompt | llm | parser
+
+
+def _extraction_input(document: dict) -> dict:
+    return {
+        "document_name": document["document_name"],
+        "document_type": document["document_type"],
+        "document_content": document["document_content"],
+    }
+
+
+# Changes whenever the extraction prompts or schema change, invalidating stored extractions
+EXTRACTION_PROMPT_VERSION = hashlib.sha256(
+    "\n".join([
+        EXTRACTION_SYSTEM_PROMPT,
+        EXTRACTION_USER_PROMPT,
+        json.dumps(ExtractedDocumentData.model_json_schema(), sort_keys=True),
+    ]).encode("utf-8")
+).hexdigest()[:16]
+
+
+# Extractions stored for documents imported from user-assistant sessions. They
+# come from already structured data, so they stay valid when the prompt changes
+IMPORTED_EXTRACTION_VERSION = "user-assistant-session"
+
+
+def _compute_text_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def _parse_extraction_result(document: dict, result) -> Optional[ExtractedDocumentData]:
+    """Parse raw chain output; returns None if extraction failed."""
+    if isinstance(result, Exception):
+        logger.warning(f"Failed to extract data from {document['document_name']}: {result}")
+        return None
     
     try:
-        result = chain.invoke({
-            "document_name": document["document_name"],
-            "document_type": document["document_type"],
-            "document_content": document["document_content"],
-        })
-        
         # Ensure document_name is set
         if isinstance(result, dict):
             result["document_name"] = document["document_name"]
@@ -152,12 +195,239 @@ def _extract_document_data(llm, document: dict) -> ExtractedDocumentData:
         return result
         
     except Exception as e:
-        logger.warning(f"Failed to extract data from {document['document_name']}: {e}")
-        # Return minimal data on failure
-        return ExtractedDocumentData(document_name=document["document_name"])
+        logger.warning(f"Failed to parse extracted data from {document['document_name']}: {e}")
+        return None
+
+
+def _get_extraction_max_concurrency() -> int:
+    return max(1, getattr(settings, "DISCREPANCY_EXTRACTION_MAX_CONCURRENCY", 4))
+
+
+def _extract_documents_data(
+    llm,
+    documents: list[dict],
+    max_concurrency: Optional[int] = None
+) -> list[Optional[ExtractedDocumentData]]:
+    """
+    Extract structured data from all documents with bounded concurrency.
+    
+    Results keep the order of `documents`; a failed extraction yields
+    None for that document only.
+    """
+    if not documents:
+        return []
+    
+    if max_concurrency is None:
+        max_concurrency = _get_extraction_max_concurrency()
+    
+    chain = _build_extraction_chain(llm)
+    results = chain.batch(
+        [_extraction_input(doc) for doc in documents],
+        config={"max_concurrency": max_concurrency},
+        return_exceptions=True,
+    )
+    
+    return [
+        _parse_extraction_result(doc, result)
+        for doc, result in zip(documents, results)
+    ]
+
+
+def _extract_documents_data_cached(
+    llm,
+    ocr_list: list,
+    documents: list[dict],
+) -> tuple[list[ExtractedDocumentData], int]:
+    """
+    Extract structured data, reusing stored extractions for OCR results
+    whose text and extraction prompt haven't changed.
+    
+    Args:
+        llm: LLM used for documents without a usable stored extraction
+        ocr_list: OCRResult instances, aligned with `documents`
+        documents: Output of prepare_documents_context(ocr_list)
+        
+    Returns:
+        Tuple of (extracted data in document order, number of reused extractions)
+    """
+    from clerk_assistant.models import DocumentExtraction
+    
+    stored = {
+        extraction.ocr_result_id: extraction
+        for extraction in DocumentExtraction.objects.filter(
+            ocr_result__in=ocr_list,
+            prompt_version__in=[EXTRACTION_PROMPT_VERSION, IMPORTED_EXTRACTION_VERSION],
+        )
+    }
+    
+    extracted_data = [None] * len(documents)
+    text_hashes = [_compute_text_hash(ocr.extracted_text) for ocr in ocr_list]
+    pending = []
+    
+    for i, (ocr, doc) in enumerate(zip(ocr_list, documents)):
+        extraction = stored.get(ocr.id)
+        if extraction is not None and extraction.text_hash == text_hashes[i]:
+            extracted_data[i] = ExtractedDocumentData(
+                **{**extraction.data, "document_name": doc["document_name"]}
+            )
+        else:
+            pending.append(i)
+    
+    reused = len(documents) - len(pending)
+    logger.info(f"Reusing {reused} stored extractions, extracting {len(pending)} documents")
+    
+    if pending:
+        fresh = _extract_documents_data(llm, [documents[i] for i in pending])
+        
+        for i, data in zip(pending, fresh):
+            if data is None:
+                # Return minimal data on failure and don't persist it
+                extracted_data[i] = ExtractedDocumentData(document_name=documents[i]["document_name"])
+                continue
+            
+            extracted_data[i] = data
+            DocumentExtraction.objects.update_or_create(
+                ocr_result=ocr_list[i],
+                defaults={
+                    "text_hash": text_hashes[i],
+                    "prompt_version": EXTRACTION_PROMPT_VERSION,
+                    "data": data.model_dump(),
+                },
+            )
+    
+    return extracted_data, reused
+
+
+FIELD_NAMES_PL = {
+    "accident_date": "Data wypadku",
+    "accident_time": "Godzina wypadku",
+    "accident_location": "Miejsce wypadku",
+    "workplace_name": "Nazwa zakładu",
+    "victim_name": "Imię i nazwisko poszkodowanego",
+    "victim_pesel": "PESEL poszkodowanego",
+    "victim_address": "Adres poszkodowanego",
+    "victim_position": "Stanowisko poszkodowanego",
+    "witnesses": "Świadkowie",
+    "circumstances": "Okoliczności wypadku",
+    "causes": "Przyczyny wypadku",
+    "injuries": "Obrażenia",
+    "employer_name": "Nazwa pracodawcy",
+    "employer_nip": "NIP pracodawcy",
+}
+
+# Fields compared locally after normalization, with their severity on mismatch
+RULE_BASED_FIELDS = {
+    "accident_date": "critical",
+    "accident_time": "major",
+    "victim_name": "critical",
+    "victim_pesel": "critical",
+    "employer_nip": "major",
+}
+
+# Remaining descriptive fields still need the LLM to judge
+LLM_COMPARED_FIELDS = [
+    field_name for field_name in ExtractedDocumentData.model_fields
+    if field_name != "document_name" and field_name not in RULE_BASED_FIELDS
+]
+
+
+def _normalize_field_value(field_name: str, value: str) -> str:
+    if field_name == "accident_date":
+        parsed = parse_date(value)
+        return parsed.isoformat() if parsed else normalize_text(value)
+    if field_name == "accident_time":
+        return normalize_time(value) or normalize_text(value)
+    if field_name == "victim_name":
+        return normalize_person_name(value)
+    if field_name in ("victim_pesel", "employer_nip"):
+        return normalize_digits(value) or normalize_text(value)
+    return normalize_text(value)
+
+
+def _check_identifier(data: ExtractedDocumentData, field_name: str, validator, label: str) -> Optional[DiscrepancyItem]:
+    value = getattr(data, field_name)
+    if not value or validator(value):
+        return None
+    
+    return DiscrepancyItem(
+        field_name=field_name,
+        description=f"Nieprawidłowy {label} w dokumencie {data.document_name} "
+                    f"(błędna długość lub suma kontrolna)",
+        document_references=[data.document_name],
+        severity="major",
+        conflicting_values=[normalize_whitespace(value)],
+    )
+
+
+def _compare_structured_fields(extracted_data: list[ExtractedDocumentData]) -> list[DiscrepancyItem]:
+    """
+    Compare dates, times, names and identifiers without the LLM.
+    
+    Values are normalized first, so format-only differences (12.03.2024 vs
+    2024-03-12, "Kowalski Jan" vs "Jan Kowalski") are not reported.
+    Documents missing a field are ignored for that field.
+    """
+    discrepancies = []
+    
+    for field_name, severity in RULE_BASED_FIELDS.items():
+        # normalized value -> [(document name, original value)]
+        groups: dict[str, list[tuple[str, str]]] = {}
+        for data in extracted_data:
+            value = getattr(data, field_name)
+            if not value:
+                continue
+            key = _normalize_field_value(field_name, value)
+            if key:
+                groups.setdefault(key, []).append((data.document_name, normalize_whitespace(value)))
+        
+        if len(groups) < 2:
+            continue
+        
+        discrepancies.append(DiscrepancyItem(
+            field_name=field_name,
+            description=f"{FIELD_NAMES_PL[field_name]} różni się pomiędzy dokumentami",
+            document_references=[name for group in groups.values() for name, _ in group],
+            severity=severity,
+            conflicting_values=[
+                f"{group[0][1]} ({', '.join(name for name, _ in group)})"
+                for group in groups.values()
+            ],
+        ))
+    
+    for data in extracted_data:
+        for item in (
+            _check_identifier(data, "victim_pesel", is_valid_pesel, "numer PESEL"),
+            _check_identifier(data, "employer_nip", is_valid_nip, "NIP pracodawcy"),
+        ):
+            if item is not None:
+                discrepancies.append(item)
+    
+    return discrepancies
 
 
 def _compare_documents(llm, extracted_data: list[ExtractedDocumentData]) -> DiscrepancyAnalysisResult:
+    rule_discrepancies = _compare_structured_fields(extracted_data)
+    logger.info(f"Rule-based comparison found {len(rule_discrepancies)} discrepancies")
+    
+    # Only descriptive fields are left for the LLM
+    llm_data = [
+        {
+            "document_name": data.document_name,
+            **{field_name: getattr(data, field_name) for field_name in LLM_COMPARED_FIELDS},
+        }
+        for data in extracted_data
+    ]
+    
+    if not any(
+        doc[field_name] for doc in llm_data for field_name in LLM_COMPARED_FIELDS
+    ):
+        logger.info("No descriptive fields to compare, skipping LLM comparison")
+        return DiscrepancyAnalysisResult(
+            discrepancies=rule_discrepancies,
+            analysis_summary="Porównano wyłącznie dane strukturalne",
+            documents_analyzed=len(extracted_data),
+        )
+    
     comparison_prompt = ChatPromptTemplate.from_messages([
         ("system", COMPARISON_SYSTEM_PROMPT),
         ("human", COMPARISON_USER_PROMPT),
@@ -169,7 +439,7 @@ def _compare_documents(llm, extracted_data: list[ExtractedDocumentData]) -> Disc
     
     # Convert extracted data to JSON for the prompt
     extracted_data_json = json.dumps(
-        [data.model_dump() for data in extracted_data],
+        llm_data,
         ensure_ascii=False,
         indent=2
     )
@@ -195,9 +465,12 @@ def _compare_documents(llm, extracted_data: list[ExtractedDocumentData]) -> Disc
                     result["analysis_summary"] = "Analiza zakończona"
             else:
                 result["analysis_summary"] = "Analiza zakończona"
-        return DiscrepancyAnalysisResult(**result)
+        analysis_result = DiscrepancyAnalysisResult(**result)
+    else:
+        analysis_result = result
     
-    return result
+    analysis_result.discrepancies = rule_discrepancies + analysis_result.discrepancies
+    return analysis_result
 
 
 def _format_discrepancy_description(disc: DiscrepancyItem) -> str:
@@ -209,24 +482,7 @@ def _format_discrepancy_description(disc: DiscrepancyItem) -> str:
     }
     severity_pl = severity_map.get(disc.severity.lower(), disc.severity.upper())
     
-    # Map field names to Polish descriptions
-    field_name_map = {
-        "accident_date": "Data wypadku",
-        "accident_time": "Godzina wypadku",
-        "accident_location": "Miejsce wypadku",
-        "workplace_name": "Nazwa zakładu",
-        "victim_name": "Imię i nazwisko poszkodowanego",
-        "victim_pesel": "PESEL poszkodowanego",
-        "victim_address": "Adres poszkodowanego",
-        "victim_position": "Stanowisko poszkodowanego",
-        "witnesses": "Świadkowie",
-        "circumstances": "Okoliczności wypadku",
-        "causes": "Przyczyny wypadku",
-        "injuries": "Obrażenia",
-        "employer_name": "Nazwa pracodawcy",
-        "employer_nip": "NIP pracodawcy",
-    }
-    field_pl = field_name_map.get(disc.field_name, disc.field_name)
+    field_pl = FIELD_NAMES_PL.get(disc.field_name, disc.field_name)
     
     # Build formatted description
     parts = [
@@ -283,11 +539,7 @@ def detect_discrepancies(analysis_id: str) -> dict:
     
     # Extract structured data from each document
     logger.info("Extracting structured data from documents...")
-    extracted_data = []
-    for doc in documents:
-        logger.debug(f"Extracting data from: {doc['document_name']}")
-        data = _extract_document_data(llm, doc)
-        extracted_data.append(data)
+    extracted_data, extractions_reused = _extract_documents_data_cached(llm, ocr_list, documents)
     
     logger.info(f"Extracted data from {len(extracted_data)} documents")
     
@@ -299,18 +551,16 @@ def detect_discrepancies(analysis_id: str) -> dict:
         logger.error(f"Document comparison failed: {e}")
         raise RuntimeError(f"Discrepancy detection failed during comparison: {str(e)}")
     
-    # Clear any existing discrepancies for this analysis (in case of re-run)
-    Discrepancy.objects.filter(analysis=analysis).delete()
-
-    created_discrepancies = []
-    for disc in analysis_result.discrepancies:
-        description = _format_discrepancy_description(disc)
-        
-        discrepancy = Discrepancy.objects.create(
-            analysis=analysis,
-            description=description
-        )
-        created_discrepancies.append(discrepancy)
+    created_discrepancies = [
+        Discrepancy(analysis=analysis, description=_format_discrepancy_description(disc))
+        for disc in analysis_result.discrepancies
+    ]
+    
+    # Replace any existing discrepancies for this analysis (in case of re-run)
+    # in one transaction, so the stage costs the same round-trips for any count
+    with transaction.atomic():
+        Discrepancy.objects.filter(analysis=analysis).delete()
+        Discrepancy.objects.bulk_create(created_discrepancies)
     
     logger.info(f"Detected {len(created_discrepancies)} discrepancies for analysis {analysis_id}")
     
@@ -318,6 +568,7 @@ def detect_discrepancies(analysis_id: str) -> dict:
         "status": "completed",
         "discrepancies_count": len(created_discrepancies),
         "documents_analyzed": analysis_result.documents_analyzed,
+        "extractions_reused": extractions_reused,
         "analysis_summary": analysis_result.analysis_summary,
         "discrepancies": [
             {
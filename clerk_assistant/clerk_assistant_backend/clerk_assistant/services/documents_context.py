@@ -0,0 +1,77 @@
+import hashlib
+import logging
+
+from django.db import IntegrityError
+
+from .llm_utils import (
+    normalize_document_text,
+    prepare_documents_context,
+    format_combined_documents_text,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def build_analysis_documents_context(analysis):
+    """
+    Build (or rebuild) the shared documents context of an analysis from its
+    OCR results.
+
+    Args:
+        analysis: Analysis model instance
+
+    Returns:
+        AnalysisDocumentsContext instance
+    """
+    from clerk_assistant.models import OCRResult, AnalysisDocumentsContext
+
+    ocr_results = OCRResult.objects.filter(
+        document__analysis=analysis
+    ).select_related('document', 'document__document_type').order_by('document__uploaded_at')
+
+    documents = prepare_documents_context(ocr_results)
+    for document in documents:
+        document["document_content"] = normalize_document_text(document["document_content"])
+
+    combined_text = format_combined_documents_text(documents)
+    content_hash = hashlib.sha256(combined_text.encode("utf-8")).hexdigest()
+
+    context, _ = AnalysisDocumentsContext.objects.update_or_create(
+        analysis=analysis,
+        defaults={
+            'documents': documents,
+            'combined_text': combined_text,
+            'content_hash': content_hash,
+        },
+    )
+
+    logger.info(f"Documents context for analysis {analysis.id}: "
+               f"{len(documents)} documents, {len(combined_text)} chars, "
+               f"hash {content_hash[:12]}")
+
+    return context
+
+
+def get_analysis_documents_context(analysis):
+    """
+    Load the shared documents context of an analysis, building it when
+    OCR ran before the context existed.
+
+    Args:
+        analysis: Analysis model instance
+
+    Returns:
+        AnalysisDocumentsContext instance
+    """
+    from clerk_assistant.models import AnalysisDocumentsContext
+
+    try:
+        return AnalysisDocumentsContext.objects.get(analysis=analysis)
+    except AnalysisDocumentsContext.DoesNotExist:
+        logger.info(f"No documents context for analysis {analysis.id}, building it")
+
+    try:
+        return build_analysis_documents_context(analysis)
+    except IntegrityError:
+        # A parallel stage built it first
+        return AnalysisDocumentsContext.objects.get(analysis=analysis)
@@ -5,7 +5,9 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 
-from .llm_utils import get_azure_llm, prepare_combined_documents_text
+from .llm_utils import get_azure_llm
+from .context_builder import build_documents_context
+from .documents_context import get_analysis_documents_context
 
 logger = logging.getLogger(__name__)
 
@@ -274,7 +276,7 @@ def _analyze_documents(llm, documents_text: str, business_context: str) -> Forma
 
 
 def perform_formal_analysis(analysis_id: str) -> dict:
-    from clerk_assistant.models import Analysis, OCRResult, FormalAnalysis
+    from clerk_assistant.models import Analysis, FormalAnalysis
     
     # Validate analysis exists
     try:
@@ -283,25 +285,25 @@ def perform_formal_analysis(analysis_id: str) -> dict:
         logger.error(f"Analysis {analysis_id} not found")
         raise ValueError(f"Analysis {analysis_id} not found")
     
-    # Fetch all OCR results for documents in this analysis
-    ocr_results = OCRResult.objects.filter(
-        document__analysis=analysis
-    ).select_related('document', 'document__document_type')
+    # Load the documents context shared by all stages
+    documents_context = get_analysis_documents_context(analysis)
     
-    if not ocr_results.exists():
+    if not documents_context.documents:
         logger.warning(f"No OCR results found for analysis {analysis_id}")
         return {
             "status": "skipped",
             "message": "No OCR results available for analysis",
         }
     
-    ocr_list = list(ocr_results)
-    
     # Initialize LLM
     llm = get_azure_llm(temperature=0.1, max_tokens=4096)
     
     # Prepare combined document text
-    documents_text = prepare_combined_documents_text(ocr_list)
+    documents_text = build_documents_context(
+        documents_context.documents,
+        stage="formal_analysis",
+        combined_text=documents_context.combined_text,
+    )
     
     # Prepare business context from Analysis model fields
     business_context_parts = []
@@ -317,7 +319,7 @@ def perform_formal_analysis(analysis_id: str) -> dict:
     business_context = "\n".join(business_context_parts) if business_context_parts else None
     
     logger.info(f"Starting formal analysis for analysis {analysis_id} "
-               f"with {len(ocr_list)} documents")
+               f"with {len(documents_context.documents)} documents")
     
     # Run formal analysis
     try:
@@ -0,0 +1,334 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Optional, Sequence
+
+from django.conf import settings
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+logger = logging.getLogger(__name__)
+
+
+def _get_setting(name: str, default):
+    return os.environ.get(name, getattr(settings, name, default))
+
+
+def _hit_rate(hits: int, misses: int) -> float:
+    total = hits + misses
+    return hits / total if total else 0.0
+
+
+class LLMResponseCache(BaseCache, ABC):
+    """
+    LangChain cache for chat model responses with TTL and size limits.
+
+    Keys are a hash of the cache version, the model parameters LangChain
+    passes as `llm_string` (deployment, temperature, max_tokens, bound
+    tools) and the rendered prompt messages. Bumping LLM_CACHE_VERSION
+    invalidates everything cached under earlier prompt templates.
+    """
+
+    def __init__(self, version: str = "1", ttl_seconds: int = 0, max_entries: int = 0):
+        self.version = version
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        digest = hashlib.sha256()
+        for part in (self.version, llm_string, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self._key(prompt, llm_string)
+        try:
+            value = self._get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed, calling the model: {e}")
+            return None
+
+        self._record(hit=value is not None)
+        if value is None:
+            return None
+
+        logger.info(f"LLM cache hit for {key[:12]}")
+        return loads(value, allowed_objects="core")
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        key = self._key(prompt, llm_string)
+        try:
+            self._set(key, dumps(list(return_val)))
+        except Exception as e:
+            logger.warning(f"LLM cache update failed for {key[:12]}: {e}")
+
+    def _record(self, hit: bool) -> None:
+        try:
+            self._incr_stat("hits" if hit else "misses")
+        except Exception as e:
+            logger.debug(f"LLM cache stats update failed: {e}")
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[str]:
+        """Stored value for the key, or None on miss or expiry."""
+
+    @abstractmethod
+    def _set(self, key: str, value: str) -> None:
+        """Store the value and trim the cache to max_entries."""
+
+    @abstractmethod
+    def _incr_stat(self, name: str) -> None:
+        """Increment the hits or misses counter."""
+
+    @abstractmethod
+    def evict(self) -> dict:
+        """Drop expired and over-limit entries, returning the counts."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Entry count, hits, misses and hit rate."""
+
+
+class SQLiteLLMCache(LLMResponseCache):
+    """Response cache in a local SQLite file, shared by workers on one host."""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS llm_cache_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        """Connection committed on success and always closed."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl_seconds > 0 and row[1] < now - self.ttl_seconds:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE llm_cache SET last_used_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def _set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if self.max_entries > 0:
+                self._trim(conn)
+
+    def _trim(self, conn: sqlite3.Connection) -> int:
+        cursor = conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        return cursor.rowcount
+
+    def _incr_stat(self, name: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO llm_cache_stats (name, value) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+                (name,),
+            )
+
+    def clear(self, **kwargs) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+            conn.execute("DELETE FROM llm_cache_stats")
+
+    def evict(self) -> dict:
+        expired = trimmed = 0
+        with self._lock, self._connect() as conn:
+            if self.ttl_seconds > 0:
+                expired = conn.execute(
+                    "DELETE FROM llm_cache WHERE created_at < ?",
+                    (time.time() - self.ttl_seconds,),
+                ).rowcount
+            if self.max_entries > 0:
+                trimmed = self._trim(conn)
+        return {"expired": expired, "trimmed": trimmed}
+
+    def stats(self) -> dict:
+        with self._lock, self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM llm_cache_stats").fetchall())
+            entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "backend": "sqlite",
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": _hit_rate(hits, misses),
+            "entries": entries,
+        }
+
+
+class RedisLLMCache(LLMResponseCache):
+    """
+    Response cache in Redis, shared by all workers. Entries expire through
+    Redis TTLs; a sorted set of last-use times drives size-based trimming.
+    """
+
+    def __init__(self, url: str, prefix: str = "clerk:llm_cache", **kwargs):
+        super().__init__(**kwargs)
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._index_key = f"{prefix}:index"
+        self._stats_key = f"{prefix}:stats"
+
+    def _entry_key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _get(self, key: str) -> Optional[str]:
+        value = self.client.get(self._entry_key(key))
+        if value is None:
+            return None
+        self.client.zadd(self._index_key, {key: time.time()})
+        return value.decode("utf-8")
+
+    def _set(self, key: str, value: str) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self._entry_key(key), value, ex=self.ttl_seconds or None)
+        pipe.zadd(self._index_key, {key: time.time()})
+        pipe.execute()
+        if self.max_entries > 0:
+            self._trim()
+
+    def _trim(self) -> int:
+        excess = self.client.zcard(self._index_key) - self.max_entries
+        if excess <= 0:
+            return 0
+        keys = [k.decode("utf-8") for k, _ in self.client.zpopmin(self._index_key, excess)]
+        if keys:
+            self.client.delete(*[self._entry_key(k) for k in keys])
+        return len(keys)
+
+    def _incr_stat(self, name: str) -> None:
+        self.client.hincrby(self._stats_key, name, 1)
+
+    def clear(self, **kwargs) -> None:
+        keys = [self._entry_key(k.decode("utf-8")) for k in self.client.zrange(self._index_key, 0, -1)]
+        if keys:
+            self.client.delete(*keys)
+        self.client.delete(self._index_key, self._stats_key)
+
+    def evict(self) -> dict:
+        # Redis drops expired values itself; forget their index entries too
+        expired = 0
+        if self.ttl_seconds > 0:
+            expired = self.client.zremrangebyscore(self._index_key, 0, time.time() - self.ttl_seconds)
+        trimmed = self._trim() if self.max_entries > 0 else 0
+        return {"expired": expired, "trimmed": trimmed}
+
+    def stats(self) -> dict:
+        counters = {k.decode("utf-8"): int(v) for k, v in self.client.hgetall(self._stats_key).items()}
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "backend": "redis",
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": _hit_rate(hits, misses),
+            "entries": self.client.zcard(self._index_key),
+        }
+
+
+def _default_redis_url() -> Optional[str]:
+    host = _get_setting("REDIS_HOST", None)
+    key = _get_setting("REDIS_KEY", None)
+    if not host or not key:
+        return None
+    port = _get_setting("REDIS_PORT", None) or 6380
+    return f"rediss://:{key}@{host}:{port}/2?ssl_cert_reqs=CERT_NONE"
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Response cache configured by LLM_CACHE_BACKEND ("redis", "sqlite" or
+    "none"), created once per process.
+
+    Returns:
+        LLMResponseCache instance, or None when caching is disabled
+    """
+    backend = str(_get_setting("LLM_CACHE_BACKEND", "none")).lower()
+    options = {
+        "version": str(_get_setting("LLM_CACHE_VERSION", "1")),
+        "ttl_seconds": getattr(settings, "LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600),
+        "max_entries": getattr(settings, "LLM_CACHE_MAX_ENTRIES", 5000),
+    }
+
+    if backend == "redis":
+        url = _get_setting("LLM_CACHE_REDIS_URL", None) or _default_redis_url()
+        if not url:
+            logger.warning("LLM_CACHE_BACKEND is redis but no Redis is configured, caching disabled")
+            return None
+        logger.info("Using Redis LLM response cache")
+        return RedisLLMCache(url, **options)
+
+    if backend == "sqlite":
+        path = _get_setting("LLM_CACHE_SQLITE_PATH", None) or os.path.join(settings.BASE_DIR, "llm_cache.sqlite3")
+        logger.info(f"Using SQLite LLM response cache at {path}")
+        return SQLiteLLMCache(str(path), **options)
+
+    if backend not in ("", "none"):
+        logger.warning(f"Unknown LLM_CACHE_BACKEND {backend!r}, caching disabled")
+    return None
+
+
+def evict_llm_cache() -> dict:
+    """
+    Drop expired responses and trim the cache to LLM_CACHE_MAX_ENTRIES.
+
+    Returns:
+        Dict with number of expired and trimmed entries plus cache stats
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        return {"status": "skipped", "message": "LLM response cache is disabled"}
+
+    result = cache.evict()
+    result.update(cache.stats())
+    logger.info(f"LLM cache eviction: {result['expired']} expired, {result['trimmed']} trimmed, "
+               f"hit rate {result['hit_rate']:.1%}")
+    return result
+
+
+def get_llm_cache_stats() -> dict:
+    """Hit/miss counters, hit rate and entry count of the response cache."""
+    cache = get_llm_cache()
+    if cache is None:
+        return {"backend": "none"}
+    return cache.stats()
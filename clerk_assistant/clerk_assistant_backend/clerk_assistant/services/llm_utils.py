@@ -1,18 +1,51 @@
 import os
+import re
 import logging
+import threading
+from typing import Optional
 
+import httpx
 from django.conf import settings
 from langchain_openai import AzureChatOpenAI
 
+from .llm_cache import get_llm_cache
+
 logger = logging.getLogger(__name__)
 
 
+# Process-wide clients keyed by configuration, so every stage reuses
+# the same keep-alive connection pool instead of opening new TLS sessions
+_llm_clients: dict[tuple, AzureChatOpenAI] = {}
+_llm_clients_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+
+
+def _get_http_client() -> httpx.Client:
+    global _http_client
+    if _http_client is None:
+        max_connections = getattr(settings, "LLM_HTTP_MAX_CONNECTIONS", 20)
+        _http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60,
+            ),
+            timeout=httpx.Timeout(120.0, connect=10.0),
+        )
+    return _http_client
+
+
 def get_azure_llm(
     temperature: float = 0.1,
     max_tokens: int = 4096
 ) -> AzureChatOpenAI:
     """
-    Create and configure Azure OpenAI LLM instance.
+    Get the shared Azure OpenAI LLM instance for the given settings.
+    
+    Instances are created once per process and per (deployment,
+    temperature, max_tokens) and share one pooled HTTP client.
+    Responses go through the LLM_CACHE_BACKEND response cache when one is
+    configured, so identical prompts skip the model call.
     
     Args:
         temperature: Model temperature (0.0-1.0). Lower = more deterministic.
@@ -21,26 +54,52 @@ def get_azure_llm(
     Returns:
         Configured AzureChatOpenAI instance
     """
-    return AzureChatOpenAI(
-        azure_endpoint=os.environ.get(
-            "AZURE_OPENAI_ENDPOINT",
-            getattr(settings, "AZURE_OPENAI_ENDPOINT", "")
-        ),
-        azure_deployment=os.environ.get(
-            "AZURE_OPENAI_DEPLOYMENT",
-            getattr(settings, "AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
-        ),
-        api_version=os.environ.get(
-            "AZURE_OPENAI_API_VERSION",
-            getattr(settings, "AZURE_OPENAI_API_VERSION", "2024-08-01-preview")
-        ),
-        api_key=os.environ.get(
-            "AZURE_OPENAI_API_KEY",
-            getattr(settings, "AZURE_OPENAI_API_KEY", None)
-        ),
-        temperature=temperature,
-        max_tokens=max_tokens,
+    endpoint = os.environ.get(
+        "AZURE_OPENAI_ENDPOINT",
+        getattr(settings, "AZURE_OPENAI_ENDPOINT", "")
+    )
+    deployment = os.environ.get(
+        "AZURE_OPENAI_DEPLOYMENT",
+        getattr(settings, "AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
+    )
+    api_version = os.environ.get(
+        "AZURE_OPENAI_API_VERSION",
+        getattr(settings, "AZURE_OPENAI_API_VERSION", "2024-08-01-preview")
     )
+    key = (endpoint, deployment, api_version, temperature, max_tokens)
+    
+    with _llm_clients_lock:
+        llm = _llm_clients.get(key)
+        if llm is None:
+            logger.info(f"Creating Azure OpenAI client for {deployment} "
+                       f"(temperature={temperature}, max_tokens={max_tokens})")
+            llm = AzureChatOpenAI(
+                azure_endpoint=endpoint,
+                azure_deployment=deployment,
+                api_version=api_version,
+                api_key=os.environ.get(
+                    "AZURE_OPENAI_API_KEY",
+                    getattr(settings, "AZURE_OPENAI_API_KEY", None)
+                ),
+                temperature=temperature,
+                max_tokens=max_tokens,
+                cache=get_llm_cache(),
+                http_client=_get_http_client(),
+            )
+            _llm_clients[key] = llm
+    
+    return llm
+
+
+def normalize_document_text(text: str) -> str:
+    """
+    Normalize OCR text: unify line endings, drop trailing spaces and
+    collapse runs of blank lines.
+    """
+    text = (text or "").replace("\r\n", "\n").replace("\r", "\n")
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
 
 
 def prepare_documents_context(ocr_results: list) -> list[dict]:
@@ -69,29 +128,39 @@ def prepare_documents_context(ocr_results: list) -> list[dict]:
     return documents
 
 
-def prepare_combined_documents_text(ocr_results: list) -> str:
+def format_combined_documents_text(documents: list[dict]) -> str:
     """
-    Prepare a single combined text from all OCR results for analysis.
+    Format document dictionaries into a single combined text for analysis.
     
     Args:
-        ocr_results: List of OCRResult model instances
+        documents: Document dictionaries as returned by prepare_documents_context
         
     Returns:
         Combined formatted string with all document contents
     """
     parts = []
     
-    for i, ocr_result in enumerate(ocr_results, 1):
-        document = ocr_result.document
-        doc_type = document.document_type.name if document.document_type else "Nieznany typ"
-        
+    for i, document in enumerate(documents, 1):
         parts.append(f"""
-=== DOKUMENT {i}: {document.filename} ===
-Typ dokumentu: {doc_type}
+=== DOKUMENT {i}: {document["document_name"]} ===
+Typ dokumentu: {document["document_type"]}
 
-{ocr_result.extracted_text}
+{document["document_content"]}
 
 --- Koniec dokumentu {i} ---
 """)
     
     return "\n".join(parts)
+
+
+def prepare_combined_documents_text(ocr_results: list) -> str:
+    """
+    Prepare a single combined text from all OCR results for analysis.
+    
+    Args:
+        ocr_results: List of OCRResult model instances
+        
+    Returns:
+        Combined formatted string with all document contents
+    """
+    return format_combined_documents_text(prepare_documents_context(ocr_results))
@@ -0,0 +1,192 @@
+import time
+import hashlib
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+def compute_content_hash(file_bytes: bytes) -> str:
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def _expiry_cutoff():
+    ttl_days = getattr(settings, "OCR_CACHE_TTL_DAYS", 30)
+    if ttl_days <= 0:
+        return None
+    return timezone.now() - timedelta(days=ttl_days)
+
+
+def get_cached_ocr(content_hash: str) -> Optional[dict]:
+    """
+    Look up OCR output for the given content hash.
+
+    Args:
+        content_hash: SHA-256 hex digest of the PDF bytes
+
+    Returns:
+        Dict shaped like analyze_pdf_from_bytes_sync output, or None on miss
+    """
+    from clerk_assistant.models import OCRCacheEntry
+
+    entries = OCRCacheEntry.objects.filter(content_hash=content_hash, claimed_at__isnull=True)
+    cutoff = _expiry_cutoff()
+    if cutoff is not None:
+        entries = entries.filter(last_used_at__gte=cutoff)
+
+    entry = entries.first()
+    if entry is None:
+        logger.info(f"OCR cache miss for {content_hash[:12]}")
+        return None
+
+    OCRCacheEntry.objects.filter(pk=entry.pk).update(
+        hit_count=F('hit_count') + 1,
+        last_used_at=timezone.now(),
+    )
+    logger.info(f"OCR cache hit for {content_hash[:12]} ({entry.hit_count + 1} hits)")
+
+    return {
+        'content': entry.extracted_text,
+        'confidence': entry.confidence_score or 0.0,
+        'page_count': entry.page_count,
+        'page_offsets': entry.page_offsets,
+        'success': True,
+        'error': None,
+    }
+
+
+def _take_over_claim(content_hash: str) -> bool:
+    """Claim an existing entry whose claim was abandoned or whose output expired."""
+    from clerk_assistant.models import OCRCacheEntry
+
+    now = timezone.now()
+    takeover = Q(claimed_at__lt=now - timedelta(seconds=getattr(settings, "OCR_CLAIM_TIMEOUT_SECONDS", 600)))
+    cutoff = _expiry_cutoff()
+    if cutoff is not None:
+        takeover |= Q(claimed_at__isnull=True, last_used_at__lt=cutoff)
+
+    # Conditional update, so only one worker wins the takeover
+    return OCRCacheEntry.objects.filter(takeover, content_hash=content_hash).update(claimed_at=now) == 1
+
+
+def claim_ocr(content_hash: str) -> Optional[dict]:
+    """
+    Return cached OCR output, or claim the content hash for this worker.
+
+    The claim is a pending cache entry held in the database, so workers in
+    other processes and on other hosts never send the same PDF to Document
+    Intelligence at once. While another worker holds the claim this waits for
+    its output. A claim that is never finished is taken over after
+    OCR_CLAIM_TIMEOUT_SECONDS.
+
+    Args:
+        content_hash: SHA-256 hex digest of the PDF bytes
+
+    Returns:
+        Cached output like get_cached_ocr, or None when the caller now holds
+        the claim and must run OCR, then call store_cached_ocr
+    """
+    from clerk_assistant.models import OCRCacheEntry
+
+    poll_seconds = max(1, getattr(settings, "OCR_CLAIM_POLL_SECONDS", 2))
+    while True:
+        cached = get_cached_ocr(content_hash)
+        if cached is not None:
+            return cached
+
+        try:
+            with transaction.atomic():
+                OCRCacheEntry.objects.create(
+                    content_hash=content_hash,
+                    extracted_text='',
+                    claimed_at=timezone.now(),
+                )
+            return None
+        except IntegrityError:
+            pass
+
+        if _take_over_claim(content_hash):
+            logger.info(f"Took over OCR claim for {content_hash[:12]}")
+            return None
+
+        logger.info(f"Waiting for another worker to OCR {content_hash[:12]}")
+        time.sleep(poll_seconds)
+
+
+def release_ocr_claim(content_hash: str) -> None:
+    """Drop the pending entry after failed OCR, so another worker can retry."""
+    from clerk_assistant.models import OCRCacheEntry
+
+    OCRCacheEntry.objects.filter(content_hash=content_hash, claimed_at__isnull=False).delete()
+
+
+def store_cached_ocr(content_hash: str, ocr_result: dict) -> None:
+    """
+    Store OCR output under the given content hash and finish the claim.
+    Failed output is not cached, the claim is released instead.
+
+    Args:
+        content_hash: SHA-256 hex digest of the PDF bytes
+        ocr_result: Output of analyze_pdf_from_bytes_sync
+    """
+    from clerk_assistant.models import OCRCacheEntry
+
+    if not ocr_result.get('success'):
+        release_ocr_claim(content_hash)
+        return
+
+    try:
+        OCRCacheEntry.objects.update_or_create(
+            content_hash=content_hash,
+            defaults={
+                'extracted_text': ocr_result['content'],
+                'confidence_score': ocr_result['confidence'],
+                'page_count': ocr_result['page_count'],
+                'page_offsets': ocr_result.get('page_offsets', []),
+                'claimed_at': None,
+                'last_used_at': timezone.now(),
+            },
+        )
+    except IntegrityError:
+        # Another worker stored the same content first
+        logger.debug(f"OCR cache entry {content_hash[:12]} already stored")
+
+
+def evict_ocr_cache() -> dict:
+    """
+    Drop expired entries, then trim the cache to OCR_CACHE_MAX_ENTRIES
+    least recently used entries.
+
+    Returns:
+        Dict with number of expired and trimmed entries
+    """
+    from clerk_assistant.models import OCRCacheEntry
+
+    expired = 0
+    cutoff = _expiry_cutoff()
+    if cutoff is not None:
+        expired, _ = OCRCacheEntry.objects.filter(last_used_at__lt=cutoff).delete()
+
+    trimmed = 0
+    max_entries = getattr(settings, "OCR_CACHE_MAX_ENTRIES", 10000)
+    if max_entries > 0:
+        # Everything used at or before the first entry past the limit goes
+        boundary = list(
+            OCRCacheEntry.objects.order_by('-last_used_at')
+            .values_list('last_used_at', flat=True)[max_entries:max_entries + 1]
+        )
+        if boundary:
+            trimmed, _ = OCRCacheEntry.objects.filter(last_used_at__lte=boundary[0]).delete()
+
+    logger.info(f"OCR cache eviction: {expired} expired, {trimmed} trimmed")
+
+    return {
+        "expired": expired,
+        "trimmed": trimmed,
+        "remaining": OCRCacheEntry.objects.count(),
+    }
@@ -1,6 +1,9 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
+from django.conf import settings
+from django.db import connection
 from pydantic import BaseModel, Field
 
 from .ocr_utils import (
@@ -8,6 +11,14 @@ from .ocr_utils import (
     validate_pdf_bytes,
     extract_key_info_from_text,
 )
+from .documents_context import build_analysis_documents_context
+from .ocr_cache import (
+    claim_ocr,
+    compute_content_hash,
+    get_cached_ocr,
+    release_ocr_claim,
+    store_cached_ocr,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +33,8 @@ class DocumentOCRResult(BaseModel):
     page_count: int = Field(default=0, description="Number of pages processed")
     error: Optional[str] = Field(default=None, description="Error message if failed")
     key_info: Optional[dict] = Field(default=None, description="Extracted key information")
+    cache_hit: bool = Field(default=False, description="Whether OCR output came from the content-hash cache")
+    ocr_called: bool = Field(default=False, description="Whether Document Intelligence was called for this document")
 
 
 class OCRProcessingResult(BaseModel):
@@ -30,6 +43,8 @@ class OCRProcessingResult(BaseModel):
     documents_processed: int = Field(description="Number of documents processed")
     documents_succeeded: int = Field(description="Number of successful OCR extractions")
     documents_failed: int = Field(description="Number of failed OCR extractions")
+    cache_hits: int = Field(default=0, description="Number of documents served from the OCR cache")
+    cache_misses: int = Field(default=0, description="Number of documents freshly processed by Document Intelligence")
     results: list[DocumentOCRResult] = Field(default_factory=list, description="Individual document results")
     message: str = Field(description="Summary message")
 
@@ -50,31 +65,51 @@ def _process_single_document(document) -> DocumentOCRResult:
             key_info=extract_key_info_from_text(document.ocr_result.extracted_text),
         )
     
-    try:
-        document.file.open('rb')
-        file_bytes = document.file.read()
-        document.file.close()
-    except Exception as e:
-        logger.error(f"Failed to read file {document.filename}: {e}")
-        return DocumentOCRResult(
-            document_id=str(document.id),
-            filename=document.filename,
-            success=False,
-            error=f"Failed to read file: {str(e)}",
-        )
+    # Uploads are hashed and validated while streaming, so a cache hit
+    # doesn't need to read the file back from storage
+    ocr_result = get_cached_ocr(document.content_hash) if document.content_hash else None
+    cache_hit = ocr_result is not None
+    ocr_called = False
     
-    is_valid, error_msg = validate_pdf_bytes(file_bytes)
-    if not is_valid:
-        logger.warning(f"Invalid PDF {document.filename}: {error_msg}")
-        return DocumentOCRResult(
-            document_id=str(document.id),
-            filename=document.filename,
-            success=False,
-            error=f"Invalid PDF: {error_msg}",
-        )
-    
-    logger.info(f"Running OCR on {document.filename}")
-    ocr_result = analyze_pdf_from_bytes_sync(file_bytes)
+    if not cache_hit:
+        try:
+            document.file.open('rb')
+            file_bytes = document.file.read()
+            document.file.close()
+        except Exception as e:
+            logger.error(f"Failed to read file {document.filename}: {e}")
+            return DocumentOCRResult(
+                document_id=str(document.id),
+                filename=document.filename,
+                success=False,
+                error=f"Failed to read file: {str(e)}",
+            )
+        
+        is_valid, error_msg = validate_pdf_bytes(file_bytes)
+        if not is_valid:
+            logger.warning(f"Invalid PDF {document.filename}: {error_msg}")
+            return DocumentOCRResult(
+                document_id=str(document.id),
+                filename=document.filename,
+                success=False,
+                error=f"Invalid PDF: {error_msg}",
+            )
+        
+        content_hash = compute_content_hash(file_bytes)
+        
+        # Waits while a worker in any process runs OCR on the same bytes
+        ocr_result = claim_ocr(content_hash)
+        cache_hit = ocr_result is not None
+        
+        if not cache_hit:
+            logger.info(f"Running OCR on {document.filename}")
+            try:
+                ocr_result = analyze_pdf_from_bytes_sync(file_bytes)
+            except Exception:
+                release_ocr_claim(content_hash)
+                raise
+            store_cached_ocr(content_hash, ocr_result)
+            ocr_called = True
     
     if not ocr_result['success']:
         logger.error(f"OCR failed for {document.filename}: {ocr_result['error']}")
@@ -83,6 +118,7 @@ def _process_single_document(document) -> DocumentOCRResult:
             filename=document.filename,
             success=False,
             error=ocr_result['error'],
+            ocr_called=ocr_called,
         )
     
 
@@ -90,13 +126,20 @@ def _process_single_document(document) -> DocumentOCRResult:
         document=document,
         extracted_text=ocr_result['content'],
         confidence_score=ocr_result['confidence'],
+        page_offsets=ocr_result.get('page_offsets', []),
     )
     
+    if ocr_result['page_count'] and document.page_count != ocr_result['page_count']:
+        # Document Intelligence count replaces the estimate made at upload
+        document.page_count = ocr_result['page_count']
+        document.save(update_fields=['page_count'])
+    
     key_info = extract_key_info_from_text(ocr_result['content'])
     
     logger.info(f"OCR completed for {document.filename}: "
                f"{len(ocr_result['content'])} chars, "
-               f"{ocr_result['confidence']:.2%} confidence")
+               f"{ocr_result['confidence']:.2%} confidence"
+               f"{' (cached)' if cache_hit else ''}")
     
     return DocumentOCRResult(
         document_id=str(document.id),
@@ -107,10 +150,38 @@ def _process_single_document(document) -> DocumentOCRResult:
         page_count=ocr_result['page_count'],
         error=None,
         key_info=key_info,
+        cache_hit=cache_hit,
+        ocr_called=ocr_called,
     )
 
 
-def process_ocr(analysis_id: str) -> dict:
+def _get_ocr_max_concurrency() -> int:
+    return max(1, getattr(settings, "OCR_MAX_CONCURRENCY", 4))
+
+
+def _process_document_safely(document) -> DocumentOCRResult:
+    """One failing document is reported as a failed result, not raised."""
+    try:
+        return _process_single_document(document)
+    except Exception as e:
+        logger.exception(f"Unexpected OCR error for {document.filename}")
+        return DocumentOCRResult(
+            document_id=str(document.id),
+            filename=document.filename,
+            success=False,
+            error=f"Unexpected error: {str(e)}",
+        )
+
+
+def _process_document_in_worker(document) -> DocumentOCRResult:
+    try:
+        return _process_document_safely(document)
+    finally:
+        # Worker threads get their own DB connection - don't leak it
+        connection.close()
+
+
+def process_ocr(analysis_id: str, max_concurrency: Optional[int] = None) -> dict:
     from clerk_assistant.models import Analysis, Document
     
     try:
@@ -119,7 +190,7 @@ def process_ocr(analysis_id: str) -> dict:
         logger.error(f"Analysis {analysis_id} not found")
         raise ValueError(f"Analysis {analysis_id} not found")
     
-    documents = Document.objects.filter(analysis=analysis).select_related('document_type')
+    documents = Document.objects.filter(analysis=analysis).select_related('document_type', 'ocr_result')
     
     if not documents.exists():
         logger.warning(f"No documents found for analysis {analysis_id}")
@@ -132,21 +203,25 @@ def process_ocr(analysis_id: str) -> dict:
             "results": [],
         }
     
+    document_list = list(documents)
+    if max_concurrency is None:
+        max_concurrency = _get_ocr_max_concurrency()
+    workers = max(1, min(max_concurrency, len(document_list)))
+    
     logger.info(f"Starting OCR processing for analysis {analysis_id} "
-               f"with {documents.count()} documents")
+               f"with {len(document_list)} documents ({workers} concurrent)")
     
-    results = []
-    succeeded = 0
-    failed = 0
+    if workers == 1:
+        results = [_process_document_safely(document) for document in document_list]
+    else:
+        # executor.map keeps results in document order
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr") as executor:
+            results = list(executor.map(_process_document_in_worker, document_list))
     
-    for document in documents:
-        result = _process_single_document(document)
-        results.append(result)
-        
-        if result.success:
-            succeeded += 1
-        else:
-            failed += 1
+    succeeded = sum(1 for result in results if result.success)
+    failed = len(results) - succeeded
+    cache_hits = sum(1 for result in results if result.cache_hit)
+    ocr_calls = sum(1 for result in results if result.ocr_called)
     
     if failed == 0:
         status = "completed"
@@ -158,7 +233,13 @@ def process_ocr(analysis_id: str) -> dict:
         status = "partial"
         message = f"{succeeded} documents succeeded, {failed} documents failed"
     
-    logger.info(f"OCR processing completed for {analysis_id}: {message}")
+    logger.info(f"OCR processing completed for {analysis_id}: {message} "
+               f"(cache: {cache_hits} hits, {ocr_calls} misses)")
+    
+    # Build the combined documents context once for all LLM stages
+    documents_context_hash = None
+    if succeeded > 0:
+        documents_context_hash = build_analysis_documents_context(analysis).content_hash
     
     return {
         "status": status,
@@ -166,10 +247,13 @@ def process_ocr(analysis_id: str) -> dict:
         "documents_processed": len(results),
         "documents_succeeded": succeeded,
         "documents_failed": failed,
+        "cache_hits": cache_hits,
+        "cache_misses": ocr_calls,
+        "documents_context_hash": documents_context_hash,
         "results": [r.model_dump() for r in results],
     }
 
 
 # Synchronous wrapper for Celery tasks
-def process_ocr_sync(analysis_id: str) -> dict:
-    return process_ocr(analysis_id)
+def process_ocr_sync(analysis_id: str, max_concurrency: Optional[int] = None) -> dict:
+    return process_ocr(analysis_id, max_concurrency=max_concurrency)
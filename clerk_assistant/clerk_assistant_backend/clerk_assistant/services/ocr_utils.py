@@ -44,6 +44,7 @@ def analyze_pdf_from_bytes_sync(
             'content': '',
             'confidence': 0.0,
             'page_count': 0,
+            'page_offsets': [],
             'success': False,
             'error': str(e)
         }
@@ -71,11 +72,13 @@ def analyze_pdf_from_bytes_sync(
         
         avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
         page_count = len(result.pages) if hasattr(result, 'pages') else 0
+        page_offsets = get_page_offsets(result)
         
         return {
             'content': content,
             'confidence': round(avg_confidence, 4),
             'page_count': page_count,
+            'page_offsets': page_offsets,
             'success': True,
             'error': None
         }
@@ -86,24 +89,66 @@ def analyze_pdf_from_bytes_sync(
             'content': '',
             'confidence': 0.0,
             'page_count': 0,
+            'page_offsets': [],
             'success': False,
             'error': str(e)
         }
 
 
-def validate_pdf_bytes(file_bytes: bytes) -> Tuple[bool, str]:
-    if not file_bytes:
+def get_page_offsets(result) -> list[int]:
+    """
+    Start offset of every page within result.content, taken from the page spans.
+    """
+    offsets = []
+    for page in getattr(result, 'pages', None) or []:
+        spans = getattr(page, 'spans', None) or []
+        if spans:
+            offsets.append(spans[0].offset)
+        elif offsets:
+            # Empty page: starts where the previous one did
+            offsets.append(offsets[-1])
+        else:
+            offsets.append(0)
+    return offsets
+
+
+def split_pages(text: str, page_offsets: list[int]) -> list[str]:
+    """
+    Split OCR text into pages using stored page offsets. Text stored without
+    offsets is split on form feeds, or returned as a single page.
+    """
+    if not page_offsets:
+        return text.split('\f') if '\f' in text else [text]
+    
+    bounds = list(page_offsets[1:]) + [len(text)]
+    return [text[start:end].strip('\n') for start, end in zip(page_offsets, bounds)]
+
+
+PDF_HEADER = b'%PDF-'
+MIN_PDF_SIZE = 1024
+
+
+def validate_pdf_header(header: bytes, size: int) -> Tuple[bool, str]:
+    """
+    Validate a PDF from its first bytes and total size, so uploads can be
+    checked while streaming without holding the whole file.
+    """
+    if not size:
         return False, "Plik jest pusty"
     
-    if not file_bytes.startswith(b'%PDF-'):
+    if not header.startswith(PDF_HEADER):
         return False, "Plik nie jest poprawnym PDF (brak nagłówka %PDF-)"
     
-    if len(file_bytes) < 1024:
+    if size < MIN_PDF_SIZE:
         return False, "Plik PDF jest zbyt mały (< 1KB)"
     
     return True, ""
 
 
+def validate_pdf_bytes(file_bytes: bytes) -> Tuple[bool, str]:
+    return validate_pdf_header(file_bytes[:len(PDF_HEADER)], len(file_bytes))
+
+
 def extract_key_info_from_text(text: str) -> dict:
     info = {
         'has_date': False,
@@ -7,7 +7,9 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 
-from .llm_utils import get_azure_llm, prepare_combined_documents_text
+from .llm_utils import get_azure_llm
+from .context_builder import build_documents_context, count_tokens
+from .documents_context import get_analysis_documents_context
 
 logger = logging.getLogger(__name__)
 
@@ -161,7 +163,7 @@ def _analyze_opinion(
 
 def generate_legal_opinion(analysis_id: str) -> dict:
     from clerk_assistant.models import (
-        Analysis, OCRResult, FormalAnalysis, 
+        Analysis, FormalAnalysis, 
         Discrepancy, Recommendation, Opinion
     )
     
@@ -174,20 +176,17 @@ def generate_legal_opinion(analysis_id: str) -> dict:
         logger.error(f"Analysis {analysis_id} not found")
         raise ValueError(f"Analysis {analysis_id} not found")
     
-    # Pobierz wyniki OCR
-    ocr_results = OCRResult.objects.filter(
-        document__analysis=analysis
-    ).select_related('document', 'document__document_type')
+    # Pobierz wspólny kontekst dokumentów
+    documents_context = get_analysis_documents_context(analysis)
     
-    if not ocr_results.exists():
+    if not documents_context.documents:
         logger.warning(f"No OCR results found for analysis {analysis_id}")
         return {
             "status": "skipped",
             "message": "No OCR results available for analysis",
         }
     
-    ocr_list = list(ocr_results)
-    logger.info(f"Found {len(ocr_list)} OCR results")
+    logger.info(f"Found {len(documents_context.documents)} documents in context")
     
     # Pobierz FormalAnalysis
     formal_analysis_data = {}
@@ -228,7 +227,18 @@ def generate_legal_opinion(analysis_id: str) -> dict:
 
 
     
-    documents_text = prepare_combined_documents_text(ocr_list)
+    # Earlier stage results share the prompt with the documents
+    reserved_tokens = count_tokens(json.dumps(
+        [formal_analysis_data, discrepancies_data, recommendations_data],
+        ensure_ascii=False,
+        indent=2,
+    ))
+    documents_text = build_documents_context(
+        documents_context.documents,
+        stage="opinion",
+        reserved_tokens=reserved_tokens,
+        combined_text=documents_context.combined_text,
+    )
     logger.info(f"Prepared combined documents text: {len(documents_text)} characters")
     
     # Przygotuj kontekst biznesowy
@@ -0,0 +1,216 @@
+import hashlib
+import logging
+from typing import Optional
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+PIPELINE_STAGES = ['ocr', 'discrepancies', 'formal_analysis', 'recommendations', 'opinion']
+
+# Result key holding the item count of each stage
+STAGE_COUNT_KEYS = {
+    'ocr': 'documents_succeeded',
+    'discrepancies': 'discrepancies_count',
+    'recommendations': 'recommendations_count',
+}
+
+
+def _empty_stage() -> dict:
+    return {"state": "pending", "started_at": None, "finished_at": None, "count": None}
+
+
+def _build_progress(analysis):
+    """
+    Build the progress record from the current results, for analyses that
+    were processed before progress was recorded.
+    """
+    from clerk_assistant.models import AnalysisProgress, OCRResult
+    
+    stages = {stage: _empty_stage() for stage in PIPELINE_STAGES}
+    counts = {
+        'ocr': OCRResult.objects.filter(document__analysis=analysis).count(),
+        'discrepancies': analysis.discrepancies.count(),
+        'formal_analysis': int(hasattr(analysis, 'formal_analysis')),
+        'recommendations': analysis.recommendations.count(),
+        'opinion': int(hasattr(analysis, 'opinion')),
+    }
+    for stage, count in counts.items():
+        if count:
+            stages[stage].update(state="completed", count=count if stage in STAGE_COUNT_KEYS else None)
+    
+    try:
+        return AnalysisProgress.objects.create(
+            analysis=analysis,
+            stages=stages,
+            documents_count=analysis.documents.count(),
+        )
+    except IntegrityError:
+        # A task created it in the meantime
+        return AnalysisProgress.objects.get(analysis=analysis)
+
+
+def _update_progress(analysis_id: str, update) -> None:
+    """
+    Apply `update(progress)` under a row lock and bump the version.
+    
+    Stages run in parallel and write the same row, so the read-modify-write
+    of the stages JSON is serialized. Progress is informational only:
+    failures are logged and never fail the calling task.
+    """
+    from clerk_assistant.models import Analysis, AnalysisProgress
+    
+    try:
+        with transaction.atomic():
+            progress = AnalysisProgress.objects.select_for_update().filter(analysis_id=analysis_id).first()
+            if progress is None:
+                progress = _build_progress(Analysis.objects.get(id=analysis_id))
+                progress = AnalysisProgress.objects.select_for_update().get(id=progress.id)
+            
+            update(progress)
+            progress.version += 1
+            progress.save()
+    except Exception as e:
+        logger.warning(f"Failed to record progress for analysis {analysis_id}: {e}")
+
+
+def record_stage(analysis_id: str, stage: str, state: str, count: Optional[int] = None) -> None:
+    """
+    Record a pipeline stage transition.
+    
+    Args:
+        analysis_id: UUID of the analysis
+        stage: One of PIPELINE_STAGES
+        state: "running", "completed", "skipped" or "failed"
+        count: Number of items the stage produced, if it has one
+    """
+    def update(progress):
+        now = timezone.now().isoformat()
+        entry = {**_empty_stage(), **progress.stages.get(stage, {})}
+        entry["state"] = state
+        if state == "running":
+            entry.update(started_at=now, finished_at=None, count=None)
+        else:
+            entry["finished_at"] = now
+            if count is not None:
+                entry["count"] = count
+        progress.stages = {**progress.stages, stage: entry}
+    
+    _update_progress(analysis_id, update)
+
+
+def record_stage_result(analysis_id: str, stage: str, result: dict) -> None:
+    """Record a finished stage from the dict its service returned."""
+    result_status = result.get("status")
+    if result_status in ("skipped", "failed"):
+        state = result_status
+    else:
+        state = "completed"
+    
+    count_key = STAGE_COUNT_KEYS.get(stage)
+    record_stage(analysis_id, stage, state, result.get(count_key) if count_key else None)
+
+
+def record_documents(analysis_id: str) -> None:
+    """Refresh the document count after documents were added."""
+    from clerk_assistant.models import Document
+    
+    def update(progress):
+        progress.documents_count = Document.objects.filter(analysis_id=analysis_id).count()
+    
+    _update_progress(analysis_id, update)
+
+
+def record_pipeline_started(analysis_id: str) -> None:
+    """Reset all stages when the pipeline (re)starts."""
+    def update(progress):
+        progress.stages = {stage: _empty_stage() for stage in PIPELINE_STAGES}
+    
+    _update_progress(analysis_id, update)
+
+
+def get_analysis_progress(analysis_id) -> Optional[object]:
+    """
+    Load the progress record together with its analysis in one query.
+    
+    Returns:
+        AnalysisProgress instance, or None if there is no record or the id is invalid
+    """
+    from django.core.exceptions import ValidationError
+    from clerk_assistant.models import AnalysisProgress
+    
+    try:
+        return AnalysisProgress.objects.select_related('analysis').filter(analysis_id=analysis_id).first()
+    except (ValidationError, ValueError):
+        return None
+
+
+def get_or_build_analysis_progress(analysis):
+    """Progress record of an already loaded analysis, built on first use."""
+    from clerk_assistant.models import AnalysisProgress
+    
+    progress = AnalysisProgress.objects.filter(analysis=analysis).first()
+    if progress is None:
+        progress = _build_progress(analysis)
+    progress.analysis = analysis
+    return progress
+
+
+def _etag(analysis_id, version: int, updated_at) -> str:
+    value = f"{analysis_id}:{version}:{updated_at.isoformat()}"
+    return '"' + hashlib.sha256(value.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def progress_etag(progress) -> str:
+    """ETag changing with every progress write and every analysis status change."""
+    analysis = progress.analysis
+    return _etag(analysis.id, progress.version, analysis.updated_at)
+
+
+def get_progress_etag(analysis) -> Optional[str]:
+    """
+    Current ETag of the progress of an already loaded analysis, reading only
+    the version instead of the stages.
+    
+    Returns:
+        ETag string, or None if there is no progress record yet
+    """
+    from clerk_assistant.models import AnalysisProgress
+    
+    versions = list(
+        AnalysisProgress.objects.filter(analysis=analysis).values_list('version', flat=True)[:1]
+    )
+    return _etag(analysis.id, versions[0], analysis.updated_at) if versions else None
+
+
+def serialize_progress(progress) -> dict:
+    analysis = progress.analysis
+    stages = {stage: {**_empty_stage(), **progress.stages.get(stage, {})} for stage in PIPELINE_STAGES}
+    
+    def has(stage):
+        entry = stages[stage]
+        if stage in STAGE_COUNT_KEYS:
+            return bool(entry["count"])
+        return entry["state"] == "completed"
+    
+    return {
+        'id': str(analysis.id),
+        'status': analysis.status,
+        'created_at': analysis.created_at,
+        'updated_at': analysis.updated_at,
+        # Progress indicators
+        'has_documents': progress.documents_count > 0,
+        'has_ocr_results': has('ocr'),
+        'has_discrepancies': has('discrepancies'),
+        'has_formal_analysis': has('formal_analysis'),
+        'has_recommendations': has('recommendations'),
+        'has_opinion': has('opinion'),
+        # Drafts are not produced by the pipeline, so they are not tracked here
+        'has_drafts': analysis.drafts.exists(),
+        'error_message': analysis.error_message,
+        'documents_count': progress.documents_count,
+        'stages': stages,
+        'progress_version': progress.version,
+    }
@@ -1,11 +1,14 @@
 import logging
 from typing import Optional
 
+from django.db import IntegrityError, transaction
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 
-from .llm_utils import get_azure_llm, prepare_combined_documents_text
+from .llm_utils import get_azure_llm
+from .context_builder import build_documents_context
+from .documents_context import get_analysis_documents_context
 
 logger = logging.getLogger(__name__)
 
@@ -214,8 +217,45 @@ def _analyze_documentation_requirements(llm, documents_text: str, business_conte
     return result
 
 
+def _resolve_document_types(names: list[str]) -> dict:
+    """
+    Map document type names to DocumentType rows, creating missing ones.
+    
+    Uses one query for the existing types and one bulk insert for the rest,
+    instead of a get_or_create round-trip per recommendation.
+    """
+    from clerk_assistant.models import DocumentType
+    
+    names = list(dict.fromkeys(names))
+    document_types = {t.name: t for t in DocumentType.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in document_types]
+    if not missing:
+        return document_types
+    
+    try:
+        with transaction.atomic():
+            DocumentType.objects.bulk_create(
+                [DocumentType(name=name, description="") for name in missing]
+            )
+    except IntegrityError:
+        # Another analysis created some of these types concurrently
+        logger.info("Document types created concurrently, resolving one by one")
+        for name in missing:
+            document_types[name], _ = DocumentType.objects.get_or_create(
+                name=name,
+                defaults={"description": ""}
+            )
+        return document_types
+    
+    # Re-read so the new rows carry primary keys on every database backend
+    document_types.update(
+        {t.name: t for t in DocumentType.objects.filter(name__in=missing)}
+    )
+    return document_types
+
+
 def analyze_documentation_requirements(analysis_id: str) -> dict:
-    from clerk_assistant.models import Analysis, OCRResult, Recommendation, DocumentType
+    from clerk_assistant.models import Analysis, Recommendation
     
     # Validate analysis exists
     try:
@@ -224,12 +264,10 @@ def analyze_documentation_requirements(analysis_id: str) -> dict:
         logger.error(f"Analysis {analysis_id} not found")
         raise ValueError(f"Analysis {analysis_id} not found")
     
-    # Fetch all OCR results for documents in this analysis
-    ocr_results = OCRResult.objects.filter(
-        document__analysis=analysis
-    ).select_related('document', 'document__document_type')
+    # Load the documents context shared by all stages
+    documents_context = get_analysis_documents_context(analysis)
     
-    if not ocr_results.exists():
+    if not documents_context.documents:
         logger.warning(f"No OCR results found for analysis {analysis_id}")
         return {
             "status": "skipped",
@@ -237,13 +275,15 @@ def analyze_documentation_requirements(analysis_id: str) -> dict:
             "recommendations_count": 0
         }
     
-    ocr_list = list(ocr_results)
-    
     # Initialize LLM
     llm = get_azure_llm(temperature=0.1, max_tokens=4096)
     
     # Prepare combined document text
-    documents_text = prepare_combined_documents_text(ocr_list)
+    documents_text = build_documents_context(
+        documents_context.documents,
+        stage="recommendations",
+        combined_text=documents_context.combined_text,
+    )
     
     # Prepare business context from Analysis model fields
     business_context_parts = []
@@ -259,7 +299,7 @@ def analyze_documentation_requirements(analysis_id: str) -> dict:
     business_context = "\n".join(business_context_parts) if business_context_parts else None
     
     logger.info(f"Starting documentation requirements analysis for analysis {analysis_id} "
-               f"with {len(ocr_list)} documents")
+               f"with {len(documents_context.documents)} documents")
     
     # Run documentation requirements analysis
     try:
@@ -268,51 +308,32 @@ def analyze_documentation_requirements(analysis_id: str) -> dict:
         logger.error(f"Documentation requirements analysis failed: {e}")
         raise RuntimeError(f"Documentation requirements analysis failed: {str(e)}")
     
-    # Clear any existing recommendations for this analysis (in case of re-run)
-    Recommendation.objects.filter(analysis=analysis).delete()
-    
     # Save all recommendations (both mandatory and additional documents)
-    created_recommendations = []
-    
-    # Process mandatory documents
-    for doc_req in analysis_result.mandatory_documents:
-        # Get or create DocumentType
-        doc_type, _ = DocumentType.objects.get_or_create(
-            name=doc_req.document_type,
-            defaults={"description": ""}
-        )
-        
-        reason = f"[OBOWIĄZKOWE] {doc_req.reason}"
-        if doc_req.context:
-            reason += f"\n\nKontekst: {doc_req.context}"
-        
-        recommendation = Recommendation.objects.create(
-            analysis=analysis,
-            document_type=doc_type,
-            reason=reason
-        )
-        created_recommendations.append(recommendation)
-        logger.debug(f"Created mandatory recommendation for {doc_type.name}")
-    
-    # Process additional documents
-    for doc_req in analysis_result.additional_documents:
-        # Get or create DocumentType
-        doc_type, _ = DocumentType.objects.get_or_create(
-            name=doc_req.document_type,
-            defaults={"description": ""}
+    requirements = (
+        [("OBOWIĄZKOWE", doc_req) for doc_req in analysis_result.mandatory_documents]
+        + [("DODATKOWE", doc_req) for doc_req in analysis_result.additional_documents]
+    )
+    
+    with transaction.atomic():
+        document_types = _resolve_document_types(
+            [doc_req.document_type for _, doc_req in requirements]
         )
         
-        reason = f"[DODATKOWE] {doc_req.reason}"
-        if doc_req.context:
-            reason += f"\n\nKontekst: {doc_req.context}"
+        created_recommendations = []
+        for label, doc_req in requirements:
+            reason = f"[{label}] {doc_req.reason}"
+            if doc_req.context:
+                reason += f"\n\nKontekst: {doc_req.context}"
+            
+            created_recommendations.append(Recommendation(
+                analysis=analysis,
+                document_type=document_types[doc_req.document_type],
+                reason=reason
+            ))
         
-        recommendation = Recommendation.objects.create(
-            analysis=analysis,
-            document_type=doc_type,
-            reason=reason
-        )
-        created_recommendations.append(recommendation)
-        logger.debug(f"Created additional recommendation for {doc_type.name}")
+        # Replace any existing recommendations for this analysis (in case of re-run)
+        Recommendation.objects.filter(analysis=analysis).delete()
+        Recommendation.objects.bulk_create(created_recommendations)
     
     # Format uncertainties for logging
     uncertainties_summary = []
@@ -0,0 +1,227 @@
+import re
+import json
+import logging
+from typing import Optional
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from .discrepancy_service import (
+    ExtractedDocumentData,
+    IMPORTED_EXTRACTION_VERSION,
+    _compute_text_hash,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# data_type of a user-assistant session -> (document type name, file name prefix)
+SESSION_DOCUMENTS = {
+    "accident": ("Zawiadomienie o wypadku", "zawiadomienie_o_wypadku"),
+    "report": ("Zawiadomienie o wypadku", "zawiadomienie_o_wypadku"),
+    "statement": ("Wyjaśnienia poszkodowanego", "wyjasnienia_poszkodowanego"),
+}
+
+# Labels of the user-assistant fields, used to render the session as document text
+SESSION_FIELD_LABELS = {
+    "accident_date": "Data wypadku",
+    "accident_time": "Godzina wypadku",
+    "location": "Miejsce wypadku",
+    "work_start_time": "Planowana godzina rozpoczęcia pracy",
+    "work_end_time": "Planowana godzina zakończenia pracy",
+    "injury_type": "Rodzaj urazu",
+    "circumstances": "Okoliczności wypadku",
+    "cause": "Przyczyna wypadku",
+    "place_description": "Opis miejsca wypadku",
+    "medical_help": "Pomoc medyczna",
+    "investigation": "Postępowanie wyjaśniające",
+    "machines_involved": "Wypadek przy obsłudze maszyn lub urządzeń",
+    "machine_name_type": "Nazwa i typ maszyny",
+    "machine_production_date": "Data produkcji maszyny",
+    "machine_condition": "Stan maszyny",
+    "proper_use": "Sposób użytkowania maszyny",
+    "machine_description": "Opis maszyny",
+    "machine_certification": "Atest / deklaracja zgodności",
+    "machine_registry": "Ewidencja środków trwałych",
+    "safety_equipment_used": "Stosowane zabezpieczenia",
+    "safety_equipment_types": "Rodzaj zabezpieczeń",
+    "safety_equipment_condition": "Stan zabezpieczeń",
+    "bhp_compliance": "Przestrzeganie zasad BHP",
+    "professional_preparation": "Przygotowanie zawodowe",
+    "bhp_training": "Szkolenie BHP",
+    "risk_assessment": "Ocena ryzyka zawodowego",
+    "risk_mitigation": "Środki zmniejszające ryzyko",
+    "safety_measures": "Asekuracja",
+    "work_solo_or_team": "Praca samodzielna lub zespołowa",
+    "sobriety_state": "Stan nietrzeźwości",
+    "sobriety_tested": "Badanie trzeźwości",
+    "sobriety_tested_by": "Badanie trzeźwości przeprowadził",
+    "investigation_authorities": "Postępowanie organów",
+    "authority_name": "Nazwa organu",
+    "authority_address": "Adres organu",
+    "authority_case_number": "Numer sprawy",
+    "authority_case_status": "Status sprawy",
+    "first_aid_provided": "Udzielono pierwszej pomocy",
+    "first_aid_date": "Data udzielenia pierwszej pomocy",
+    "medical_facility": "Placówka medyczna",
+    "hospitalization_period": "Okres hospitalizacji",
+    "hospitalization_place": "Miejsce hospitalizacji",
+    "diagnosed_injury": "Rozpoznany uraz",
+    "work_incapacity_period": "Okres niezdolności do pracy",
+    "sick_leave_on_accident_day": "Zwolnienie lekarskie w dniu wypadku",
+    "witnesses": "Świadkowie",
+    "activity_before_accident": "Czynności przed wypadkiem",
+    "event_sequence": "Przebieg zdarzeń",
+    "direct_cause": "Bezpośrednia przyczyna urazu",
+    "indirect_causes": "Czynniki, które przyczyniły się do wypadku",
+}
+
+# user-assistant field -> ExtractedDocumentData field; first non-empty source wins
+EXTRACTION_FIELD_MAP = {
+    "accident_date": ["accident_date"],
+    "accident_time": ["accident_time"],
+    "accident_location": ["location"],
+    "circumstances": ["circumstances", "event_sequence"],
+    "causes": ["cause", "direct_cause"],
+    "injuries": ["diagnosed_injury", "injury_type"],
+}
+
+
+def _format_value(value) -> str:
+    if isinstance(value, bool):
+        return "tak" if value else "nie"
+    return str(value).strip()
+
+
+def _clean_collected_data(collected_data: dict) -> dict:
+    return {
+        field: value for field, value in collected_data.items()
+        if value is not None and _format_value(value)
+    }
+
+
+def render_session_text(title: str, collected_data: dict) -> str:
+    """
+    Render collected session data as document text, so stages working on the
+    combined documents text read it like an OCR'd document.
+    """
+    lines = [title.upper(), "(dane zebrane przez asystenta zgłoszenia wypadku)", ""]
+    for field, value in collected_data.items():
+        label = SESSION_FIELD_LABELS.get(field, field)
+        lines.append(f"{label}: {_format_value(value)}")
+    return "\n".join(lines)
+
+
+def _split_witnesses(value: Optional[str]) -> list[str]:
+    if not value:
+        return []
+    return [name.strip() for name in re.split(r"[;,\n]", value) if name.strip()]
+
+
+def map_session_to_extraction(document_name: str, collected_data: dict) -> ExtractedDocumentData:
+    """
+    Map session fields onto the schema discrepancy detection compares, so the
+    imported document needs no LLM extraction.
+    """
+    data = {"document_name": document_name}
+    for target, sources in EXTRACTION_FIELD_MAP.items():
+        for source in sources:
+            value = collected_data.get(source)
+            if isinstance(value, str) and value.strip():
+                data[target] = value.strip()
+                break
+    data["witnesses"] = _split_witnesses(collected_data.get("witnesses"))
+    return ExtractedDocumentData(**data)
+
+
+def import_user_assistant_session(
+    analysis,
+    data_type: str,
+    collected_data: dict,
+    session_id: Optional[str] = None,
+):
+    """
+    Import a finished user-assistant session into an analysis as a document
+    that already has its OCR result and structured extraction.
+    
+    OCR skips documents with an OCR result and discrepancy detection reuses
+    the stored extraction, so neither Document Intelligence nor the
+    extraction LLM runs for the imported document. Importing the same
+    session again replaces the previous import.
+    
+    Args:
+        analysis: Analysis model instance
+        data_type: "accident", "report" or "statement"
+        collected_data: Collected fields of the session
+        session_id: user-assistant session id, used in the file name
+            together with data_type
+        
+    Returns:
+        Created Document instance
+    """
+    from clerk_assistant.models import (
+        AnalysisDocumentsContext,
+        Document,
+        DocumentExtraction,
+        DocumentType,
+        OCRResult,
+    )
+    
+    if data_type not in SESSION_DOCUMENTS:
+        raise ValueError(f"Unknown session data type {data_type!r}")
+    
+    collected_data = _clean_collected_data(collected_data)
+    if not collected_data:
+        raise ValueError("Session has no collected data")
+    
+    type_name, file_prefix = SESSION_DOCUMENTS[data_type]
+    # accident and report sessions share a document type, so the data type
+    # keeps their imports from replacing each other
+    filename = f"{file_prefix}_{data_type}_{session_id or 'sesja'}.json"
+    extracted_text = render_session_text(type_name, collected_data)
+    content = json.dumps(
+        {"data_type": data_type, "session_id": session_id, "collected_data": collected_data},
+        ensure_ascii=False,
+        indent=2,
+    ).encode("utf-8")
+    extraction = map_session_to_extraction(filename, collected_data)
+    
+    with transaction.atomic():
+        document_type, _ = DocumentType.objects.get_or_create(
+            name=type_name,
+            defaults={"description": ""}
+        )
+        
+        replaced, _ = Document.objects.filter(
+            analysis=analysis,
+            filename=filename,
+            source=Document.SOURCE_USER_ASSISTANT,
+        ).delete()
+        
+        document = Document.objects.create(
+            analysis=analysis,
+            document_type=document_type,
+            file=ContentFile(content, name=filename),
+            filename=filename,
+            file_size=len(content),
+            source=Document.SOURCE_USER_ASSISTANT,
+        )
+        ocr_result = OCRResult.objects.create(
+            document=document,
+            extracted_text=extracted_text,
+            confidence_score=1.0,
+        )
+        DocumentExtraction.objects.create(
+            ocr_result=ocr_result,
+            text_hash=_compute_text_hash(extracted_text),
+            prompt_version=IMPORTED_EXTRACTION_VERSION,
+            data=extraction.model_dump(),
+        )
+        
+        # The shared context no longer matches the documents; stages rebuild it
+        AnalysisDocumentsContext.objects.filter(analysis=analysis).delete()
+    
+    logger.info(f"Imported {data_type} session {session_id} into analysis {analysis.id}: "
+               f"{len(collected_data)} fields{' (replaced previous import)' if replaced else ''}")
+    
+    return document
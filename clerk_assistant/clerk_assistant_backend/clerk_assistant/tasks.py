@@ -1,9 +1,28 @@
 import logging
-from celery import shared_task, chain
+from celery import shared_task, chain, chord, group
 
 logger = logging.getLogger(__name__)
 
 
+def _record_stage_failure(analysis_id: str, message: str) -> None:
+    """
+    Mark analysis as failed and append the stage error.
+    
+    Stages run in parallel, so errors are appended under a row lock
+    instead of overwriting each other.
+    """
+    from django.db import transaction
+    from clerk_assistant.models import Analysis
+    
+    with transaction.atomic():
+        analysis = Analysis.objects.select_for_update().get(id=analysis_id)
+        analysis.status = 'failed'
+        analysis.error_message = "\n".join(
+            part for part in (analysis.error_message, message) if part
+        )
+        analysis.save(update_fields=['status', 'error_message', 'updated_at'])
+
+
 @shared_task(
     bind=True,
     name='clerk_assistant.tasks.process_ocr_task',
@@ -14,12 +33,14 @@ logger = logging.getLogger(__name__)
 )
 def process_ocr_task(self, analysis_id: str) -> dict:
     from clerk_assistant.services.ocr_service import process_ocr
-    from clerk_assistant.models import Analysis
+    from clerk_assistant.services.progress import record_stage, record_stage_result
     
     logger.info(f"Starting OCR processing task for analysis {analysis_id}")
     
     try:
+        record_stage(analysis_id, 'ocr', 'running')
         result = process_ocr(analysis_id)
+        record_stage_result(analysis_id, 'ocr', result)
         logger.info(f"OCR processing completed for {analysis_id}: "
                    f"{result.get('documents_succeeded', 0)}/{result.get('documents_processed', 0)} succeeded")
         return result
@@ -30,10 +51,8 @@ def process_ocr_task(self, analysis_id: str) -> dict:
         # Update analysis status on final failure
         try:
             if self.request.retries >= self.max_retries:
-                analysis = Analysis.objects.get(id=analysis_id)
-                analysis.status = 'failed'
-                analysis.error_message = f"OCR processing failed: {str(e)}"
-                analysis.save()
+                _record_stage_failure(analysis_id, f"OCR processing failed: {str(e)}")
+                record_stage(analysis_id, 'ocr', 'failed')
         except Exception:
             pass
         
@@ -50,12 +69,14 @@ def process_ocr_task(self, analysis_id: str) -> dict:
 )
 def detect_discrepancies_task(self, previous_result: dict, analysis_id: str) -> dict:
     from clerk_assistant.services.discrepancy_service import detect_discrepancies
-    from clerk_assistant.models import Analysis
+    from clerk_assistant.services.progress import record_stage, record_stage_result
     
     logger.info(f"Starting discrepancy detection task for analysis {analysis_id}")
     
     try:
+        record_stage(analysis_id, 'discrepancies', 'running')
         result = detect_discrepancies(analysis_id)
+        record_stage_result(analysis_id, 'discrepancies', result)
         logger.info(f"Discrepancy detection completed for {analysis_id}: "
                    f"{result.get('discrepancies_count', 0)} discrepancies found")
         return result
@@ -66,10 +87,8 @@ def detect_discrepancies_task(self, previous_result: dict, analysis_id: str) ->
         # Update analysis status on final failure
         try:
             if self.request.retries >= self.max_retries:
-                analysis = Analysis.objects.get(id=analysis_id)
-                analysis.status = 'failed'
-                analysis.error_message = f"Discrepancy detection failed: {str(e)}"
-                analysis.save()
+                _record_stage_failure(analysis_id, f"Discrepancy detection failed: {str(e)}")
+                record_stage(analysis_id, 'discrepancies', 'failed')
         except Exception:
             pass
         
@@ -86,12 +105,14 @@ def detect_discrepancies_task(self, previous_result: dict, analysis_id: str) ->
 )
 def perform_formal_analysis_task(self, previous_result: dict, analysis_id: str) -> dict:
     from clerk_assistant.services.formal_analysis_service import perform_formal_analysis
-    from clerk_assistant.models import Analysis
+    from clerk_assistant.services.progress import record_stage, record_stage_result
     
     logger.info(f"Starting formal analysis task for analysis {analysis_id}")
     
     try:
+        record_stage(analysis_id, 'formal_analysis', 'running')
         result = perform_formal_analysis(analysis_id)
+        record_stage_result(analysis_id, 'formal_analysis', result)
         logger.info(f"Formal analysis completed for {analysis_id}: "
                    f"qualifies={result.get('qualifies_as_work_accident')}")
         return result
@@ -101,10 +122,8 @@ def perform_formal_analysis_task(self, previous_result: dict, analysis_id: str)
         
         try:
             if self.request.retries >= self.max_retries:
-                analysis = Analysis.objects.get(id=analysis_id)
-                analysis.status = 'failed'
-                analysis.error_message = f"Formal analysis failed: {str(e)}"
-                analysis.save()
+                _record_stage_failure(analysis_id, f"Formal analysis failed: {str(e)}")
+                record_stage(analysis_id, 'formal_analysis', 'failed')
         except Exception:
             pass
         
@@ -121,12 +140,14 @@ def perform_formal_analysis_task(self, previous_result: dict, analysis_id: str)
 )
 def analyze_recommendations_task(self, previous_result: dict, analysis_id: str) -> dict:
     from clerk_assistant.services.recommendation_service import analyze_documentation_requirements
-    from clerk_assistant.models import Analysis
+    from clerk_assistant.services.progress import record_stage, record_stage_result
     
     logger.info(f"Starting recommendations task for analysis {analysis_id}")
     
     try:
+        record_stage(analysis_id, 'recommendations', 'running')
         result = analyze_documentation_requirements(analysis_id)
+        record_stage_result(analysis_id, 'recommendations', result)
         logger.info(f"Recommendations completed for {analysis_id}: "
                    f"{result.get('recommendations_count', 0)} recommendations")
         return result
@@ -136,10 +157,8 @@ def analyze_recommendations_task(self, previous_result: dict, analysis_id: str)
         
         try:
             if self.request.retries >= self.max_retries:
-                analysis = Analysis.objects.get(id=analysis_id)
-                analysis.status = 'failed'
-                analysis.error_message = f"Recommendations failed: {str(e)}"
-                analysis.save()
+                _record_stage_failure(analysis_id, f"Recommendations failed: {str(e)}")
+                record_stage(analysis_id, 'recommendations', 'failed')
         except Exception:
             pass
         
@@ -154,14 +173,16 @@ def analyze_recommendations_task(self, previous_result: dict, analysis_id: str)
     autoretry_for=(Exception,),
     retry_backoff=True,
 )
-def generate_opinion_task(self, previous_result: dict, analysis_id: str) -> dict:
+def generate_opinion_task(self, previous_result, analysis_id: str) -> dict:
     from clerk_assistant.services.opinion_service import generate_legal_opinion
-    from clerk_assistant.models import Analysis
+    from clerk_assistant.services.progress import record_stage, record_stage_result
     
     logger.info(f"Starting opinion generation task for analysis {analysis_id}")
     
     try:
+        record_stage(analysis_id, 'opinion', 'running')
         result = generate_legal_opinion(analysis_id)
+        record_stage_result(analysis_id, 'opinion', result)
         logger.info(f"Opinion generated for {analysis_id}: "
                    f"status={result.get('stanowisko')}")
         return result
@@ -171,10 +192,8 @@ def generate_opinion_task(self, previous_result: dict, analysis_id: str) -> dict
         
         try:
             if self.request.retries >= self.max_retries:
-                analysis = Analysis.objects.get(id=analysis_id)
-                analysis.status = 'failed'
-                analysis.error_message = f"Opinion generation failed: {str(e)}"
-                analysis.save()
+                _record_stage_failure(analysis_id, f"Opinion generation failed: {str(e)}")
+                record_stage(analysis_id, 'opinion', 'failed')
         except Exception:
             pass
         
@@ -208,27 +227,66 @@ def complete_analysis_task(self, previous_result: dict, analysis_id: str) -> dic
         raise ValueError(f"Analysis {analysis_id} not found")
 
 
+@shared_task(
+    bind=True,
+    name='clerk_assistant.tasks.evict_ocr_cache_task',
+)
+def evict_ocr_cache_task(self) -> dict:
+    from clerk_assistant.services.ocr_cache import evict_ocr_cache
+    
+    logger.info("Starting OCR cache eviction")
+    
+    result = evict_ocr_cache()
+    logger.info(f"OCR cache eviction completed: {result.get('expired', 0)} expired, "
+               f"{result.get('trimmed', 0)} trimmed, {result.get('remaining', 0)} remaining")
+    return result
+
+
+@shared_task(
+    bind=True,
+    name='clerk_assistant.tasks.evict_llm_cache_task',
+)
+def evict_llm_cache_task(self) -> dict:
+    from clerk_assistant.services.llm_cache import evict_llm_cache
+    
+    logger.info("Starting LLM cache eviction")
+    
+    result = evict_llm_cache()
+    logger.info(f"LLM cache eviction completed: {result}")
+    return result
+
+
 def run_analysis_pipeline(analysis_id: str) -> str:
     from clerk_assistant.models import Analysis
+    from clerk_assistant.services.progress import record_pipeline_started
     
     try:
         analysis = Analysis.objects.get(id=analysis_id)
         analysis.status = 'processing'
+        # Stage failures are appended, so a re-run starts from a clean message
+        analysis.error_message = None
         analysis.save()
     except Analysis.DoesNotExist:
         raise ValueError(f"Analysis {analysis_id} not found")
     
-    # Create the task chain
+    record_pipeline_started(analysis_id)
+    
+    # OCR first, then the three stages that only read OCR results run in
+    # parallel; the opinion needs all of them, so it is the chord body
     pipeline = chain(
         process_ocr_task.s(analysis_id),
-        detect_discrepancies_task.s(analysis_id),
-        perform_formal_analysis_task.s(analysis_id),
-        analyze_recommendations_task.s(analysis_id),
-        generate_opinion_task.s(analysis_id),
+        chord(
+            group(
+                detect_discrepancies_task.s(analysis_id),
+                perform_formal_analysis_task.s(analysis_id),
+                analyze_recommendations_task.s(analysis_id),
+            ),
+            generate_opinion_task.s(analysis_id),
+        ),
         complete_analysis_task.s(analysis_id),
     )
     
-    # Execute the chain
+    # Execute the pipeline
     result = pipeline.apply_async()
     
     logger.info(f"Started analysis pipeline for {analysis_id}, task_id={result.id}")
@@ -264,3 +322,15 @@ def run_opinion_generation(analysis_id: str) -> str:
     result = generate_opinion_task.delay({}, analysis_id)
     logger.info(f"Started opinion generation for {analysis_id}, task_id={result.id}")
     return result.id
+
+
+def run_ocr_cache_eviction() -> str:
+    result = evict_ocr_cache_task.delay()
+    logger.info(f"Started OCR cache eviction, task_id={result.id}")
+    return result.id
+
+
+def run_llm_cache_eviction() -> str:
+    result = evict_llm_cache_task.delay()
+    logger.info(f"Started LLM cache eviction, task_id={result.id}")
+    return result.id
\ No newline at end of file
@@ -0,0 +1,94 @@
+import re
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework.parsers import MultiPartParser
+
+from .services.ocr_utils import PDF_HEADER, validate_pdf_header
+
+
+# Page objects of the page tree; "/Type /Pages" nodes are excluded
+PAGE_OBJECT_PATTERN = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+# Bytes kept from the previous chunk so a match split across chunks is found
+PAGE_PATTERN_OVERLAP = 32
+
+
+def get_max_upload_size() -> int:
+    return getattr(settings, 'PDF_MAX_UPLOAD_MB', 50) * 1024 * 1024
+
+
+class PDFUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams each uploaded file to a temporary file while computing its
+    SHA-256 and page count and checking the %PDF- header.
+    
+    Once a file is known to be invalid (wrong header, too large) the rest
+    of it is not written. The resulting file carries `content_hash`,
+    `page_count` and `validation_error` attributes.
+    """
+    
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+        self.header = b''
+        self.tail = b''
+        self.page_count = 0
+        self.received = 0
+        self.error = None
+    
+    def _count_pages(self, chunk: bytes) -> None:
+        data = self.tail + chunk
+        # Matches ending inside the tail were counted with the previous chunk;
+        # a match at the very end waits for the next chunk's lookahead
+        self.page_count += sum(
+            1 for match in PAGE_OBJECT_PATTERN.finditer(data)
+            if len(self.tail) <= match.end() < len(data)
+        )
+        self.tail = data[-PAGE_PATTERN_OVERLAP:]
+    
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.error:
+            return None
+        
+        if len(self.header) < len(PDF_HEADER):
+            self.header += raw_data[:len(PDF_HEADER) - len(self.header)]
+            if not PDF_HEADER.startswith(self.header):
+                self.error = "Plik nie jest poprawnym PDF (brak nagłówka %PDF-)"
+                return None
+        
+        if self.received > get_max_upload_size():
+            self.error = f"Plik PDF jest zbyt duży (> {get_max_upload_size() // (1024 * 1024)}MB)"
+            return None
+        
+        self.hasher.update(raw_data)
+        self._count_pages(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+    
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        
+        if self.error is None:
+            is_valid, error = validate_pdf_header(self.header, file_size)
+            self.error = None if is_valid else error
+        
+        # A page object right at the end of the file had no lookahead yet
+        if any(match.end() == len(self.tail) for match in PAGE_OBJECT_PATTERN.finditer(self.tail)):
+            self.page_count += 1
+        
+        file.content_hash = self.hasher.hexdigest() if self.error is None else None
+        file.page_count = self.page_count or None
+        file.validation_error = self.error
+        return file
+
+
+class PDFUploadParser(MultiPartParser):
+    """
+    Multipart parser that receives files through PDFUploadHandler.
+    """
+    
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        request.upload_handlers = [PDFUploadHandler(request)]
+        return super().parse(stream, media_type, parser_context)
@@ -1,28 +1,102 @@
+import json
+
 from rest_framework import viewsets, status, mixins
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser
 from django.shortcuts import get_object_or_404
-from django.http import FileResponse
+from django.http import FileResponse, HttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.http import parse_etags
 
 from .models import (
     Analysis,
     DocumentType,
     Document,
+    OCRResult,
+    Discrepancy,
+    Recommendation,
     FormalAnalysis,
     Opinion,
     DraftDocument
 )
 from .serializers import (
     AnalysisSerializer,
+    AnalysisListSerializer,
     DocumentTypeSerializer,
     DocumentSerializer,
     DiscrepancySerializer,
     FormalAnalysisSerializer,
     RecommendationSerializer,
     OpinionSerializer,
-    DraftDocumentSerializer
+    DraftDocumentSerializer,
+    SessionImportSerializer
 )
+from .pagination import AnalysisPagination
+from .uploads import PDFUploadParser
+from .services.ocr_utils import split_pages
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Responses smaller than this are not worth compressing
+MIN_COMPRESSED_SIZE = 1024
+OCR_TEXT_PAGE_SIZE = 5
+OCR_TEXT_MAX_PAGE_SIZE = 50
+
+
+def _compressed_json_response(request, data) -> HttpResponse:
+    """
+    JSON response compressed with brotli (when installed) or gzip, whichever
+    the client accepts.
+    """
+    content = json.dumps(data, ensure_ascii=False, cls=DjangoJSONEncoder).encode('utf-8')
+    response = HttpResponse(content_type='application/json; charset=utf-8')
+    patch_vary_headers(response, ('Accept-Encoding',))
+    
+    accepted = {
+        part.split(';')[0].strip().lower()
+        for part in request.headers.get('Accept-Encoding', '').split(',')
+    }
+    if len(content) >= MIN_COMPRESSED_SIZE:
+        if brotli is not None and 'br' in accepted:
+            content = brotli.compress(content)
+            response['Content-Encoding'] = 'br'
+        elif 'gzip' in accepted:
+            content = compress_string(content)
+            response['Content-Encoding'] = 'gzip'
+    
+    response.content = content
+    return response
+
+
+def _get_positive_int(value, default: int, maximum: int = None) -> int:
+    try:
+        number = max(1, int(value))
+    except (TypeError, ValueError):
+        return default
+    return min(number, maximum) if maximum else number
+
+
+def _related_count(model):
+    """
+    Per-analysis row count as a subquery, so several counts don't multiply joins.
+    COUNT(*) is answered from the analysis foreign key index alone.
+    """
+    counts = (
+        model.objects.filter(analysis=OuterRef('pk'))
+        .order_by()
+        .values('analysis')
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts), 0)
 
 
 class DocumentTypeViewSet(viewsets.ReadOnlyModelViewSet):
@@ -39,22 +113,104 @@ class AnalysisViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Ret
     Main Analysis endpoint.
     
     POST /api/analyses/ - Create new analysis
-    GET /api/analyses/ - List all analyses
+    GET /api/analyses/ - List analyses (paginated, slim)
     GET /api/analyses/{id}/ - Retrieve complete analysis with all results
     
+    List and retrieve accept ?expand=documents,opinion to choose the nested
+    sections (list has none by default, retrieve has all) and
+    ?fields=id,status to limit the top-level fields. List also accepts
+    ?status=failed,processing to filter by status.
+    
     Update and delete operations are disabled.
     """
     queryset = Analysis.objects.all()
     serializer_class = AnalysisSerializer
+    pagination_class = AnalysisPagination
+    
+    # How each nested section is loaded in bulk when it is included
+    SELECT_RELATED_SECTIONS = ['formal_analysis', 'opinion']
+    PREFETCH_SECTIONS = {
+        'documents': Prefetch(
+            'documents',
+            queryset=Document.objects.select_related('document_type', 'ocr_result')
+            .defer('ocr_result__extracted_text')
+        ),
+        'discrepancies': Prefetch('discrepancies', queryset=Discrepancy.objects.all()),
+        'recommendations': Prefetch(
+            'recommendations',
+            queryset=Recommendation.objects.select_related('document_type')
+        ),
+        'drafts': Prefetch('drafts', queryset=DraftDocument.objects.all()),
+    }
     
-    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser])
+    def _get_list_param(self, name):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        return {part.strip() for part in value.split(',') if part.strip()}
+    
+    def get_expand(self):
+        """Nested sections to include, or None for the serializer default."""
+        if self.action not in ('list', 'retrieve'):
+            return None
+        
+        expand = self._get_list_param('expand')
+        fields = self._get_list_param('fields')
+        if expand is None and fields:
+            # Asking for a nested field by name implies expanding it
+            expand = fields & set(AnalysisSerializer.expandable_fields)
+        return expand
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return AnalysisListSerializer
+        return AnalysisSerializer
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ('list', 'retrieve'):
+            context['expand'] = self.get_expand()
+            context['fields'] = self._get_list_param('fields')
+        return context
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        
+        expand = self.get_expand()
+        if expand is None:
+            expand = self.get_serializer_class().default_expand
+        
+        select_related = [name for name in self.SELECT_RELATED_SECTIONS if name in expand]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        
+        prefetches = [prefetch for name, prefetch in self.PREFETCH_SECTIONS.items() if name in expand]
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        
+        if self.action == 'list':
+            statuses = self._get_list_param('status')
+            if statuses:
+                queryset = queryset.filter(status__in=statuses)
+            queryset = queryset.annotate(
+                documents_count=_related_count(Document),
+                discrepancies_count=_related_count(Discrepancy),
+                recommendations_count=_related_count(Recommendation),
+            )
+        
+        return queryset
+    
+    @action(detail=True, methods=['post'], parser_classes=[PDFUploadParser])
     def documents(self, request, pk=None):
         """
         Upload PDF documents to analysis.
         POST /api/analyses/{id}/documents/
         
-        Accepts multipart/form-data with PDF files.
-        Triggers async processing chain after upload.
+        Accepts multipart/form-data with PDF files. Files are hashed and
+        checked for the %PDF- header while they stream in; if any file is
+        invalid, none of them is stored.
         """
         analysis = self.get_object()
         
@@ -72,19 +228,119 @@ class AnalysisViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Ret
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        uploaded_documents = []
-        for file in files:
-            document = Document.objects.create(
+        invalid_files = {
+            f.name: f.validation_error for f in files if getattr(f, 'validation_error', None)
+        }
+        if invalid_files:
+            return Response(
+                {'error': 'Invalid PDF files', 'files': invalid_files},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        uploaded_documents = Document.objects.bulk_create([
+            Document(
                 analysis=analysis,
                 file=file,
                 filename=file.name,
-                file_size=file.size
+                file_size=file.size,
+                content_hash=getattr(file, 'content_hash', None) or '',
+                page_count=getattr(file, 'page_count', None),
             )
-            uploaded_documents.append(document)
+            for file in files
+        ])
+        
+        from .services.progress import record_documents
+        record_documents(str(analysis.id))
         
         serializer = DocumentSerializer(uploaded_documents, many=True)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
+    @action(detail=True, methods=['get'], url_path='documents/(?P<document_id>[^/.]+)/text')
+    def document_text(self, request, pk=None, document_id=None):
+        """
+        OCR text of a single document, paginated by page.
+        GET /api/analyses/{id}/documents/{document_id}/text/?page=1&page_size=5
+        
+        `page` is the first PDF page to return, `page_size` the number of
+        pages. Compressed with brotli or gzip per Accept-Encoding.
+        """
+        analysis = self.get_object()
+        ocr_result = get_object_or_404(
+            OCRResult.objects.select_related('document'),
+            document_id=document_id,
+            document__analysis=analysis,
+        )
+        
+        pages = split_pages(ocr_result.extracted_text, ocr_result.page_offsets)
+        page = _get_positive_int(request.query_params.get('page'), 1)
+        page_size = _get_positive_int(
+            request.query_params.get('page_size'), OCR_TEXT_PAGE_SIZE, OCR_TEXT_MAX_PAGE_SIZE
+        )
+        
+        if page > len(pages):
+            return Response(
+                {'error': f'Page {page} out of range, document has {len(pages)} pages'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        last_page = min(page + page_size - 1, len(pages))
+        base_url = request.build_absolute_uri(request.path)
+        
+        response = _compressed_json_response(request, {
+            'document_id': str(ocr_result.document_id),
+            'filename': ocr_result.document.filename,
+            'page_count': len(pages),
+            'pages': [
+                {'number': number, 'text': pages[number - 1]}
+                for number in range(page, last_page + 1)
+            ],
+            'next': f'{base_url}?page={last_page + 1}&page_size={page_size}' if last_page < len(pages) else None,
+            'previous': f'{base_url}?page={max(1, page - page_size)}&page_size={page_size}' if page > 1 else None,
+        })
+        # OCR text never changes once stored
+        response['Cache-Control'] = 'private, max-age=3600'
+        return response
+    
+    @action(detail=True, methods=['post'], url_path='sessions')
+    def import_session(self, request, pk=None):
+        """
+        Import a finished user-assistant session as a pre-extracted document.
+        POST /api/analyses/{id}/sessions/
+        
+        Accepts {"data_type", "session_id", "collected_data"}. The document is
+        stored with its OCR result and extraction, so the pipeline skips OCR
+        and LLM extraction for it.
+        """
+        analysis = self.get_object()
+        
+        if analysis.status != "pending":
+            return Response(
+                {'error': f'Analysis is already {analysis.status}'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        serializer = SessionImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        from .services.session_import import import_user_assistant_session
+        try:
+            document = import_user_assistant_session(
+                analysis,
+                serializer.validated_data['data_type'],
+                serializer.validated_data['collected_data'],
+                serializer.validated_data.get('session_id') or None,
+            )
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        from .services.progress import record_documents
+        record_documents(str(analysis.id))
+        
+        return Response(DocumentSerializer(document).data, status=status.HTTP_201_CREATED)
+    
     @action(detail=True, methods=['post'])
     def processing(self, request, pk=None):
         """
@@ -134,22 +390,32 @@ class AnalysisViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Ret
         
         Returns only status and progress info without full nested data.
         """
+        from .services.progress import (
+            get_or_build_analysis_progress,
+            get_progress_etag,
+            progress_etag,
+            serialize_progress,
+        )
+        
+        # Goes through get_queryset and the object permission checks
         analysis = self.get_object()
-        return Response({
-            'id': str(analysis.id),
-            'status': analysis.status,
-            'created_at': analysis.created_at,
-            'updated_at': analysis.updated_at,
-            # Progress indicators
-            'has_documents': analysis.documents.exists(),
-            'has_ocr_results': any(doc.ocr_result for doc in analysis.documents.all() if hasattr(doc, 'ocr_result')),
-            'has_discrepancies': analysis.discrepancies.exists(),
-            'has_formal_analysis': hasattr(analysis, 'formal_analysis'),
-            'has_recommendations': analysis.recommendations.exists(),
-            'has_opinion': hasattr(analysis, 'opinion'),
-            'has_drafts': analysis.drafts.exists(),
-            'error_message': analysis.error_message,
-        })
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        
+        # Repeat polls only read the progress version
+        etag = get_progress_etag(analysis) if if_none_match else None
+        if etag is None or etag not in if_none_match:
+            # Full progress record the tasks write; analyses without
+            # a record get one built on first poll
+            progress = get_or_build_analysis_progress(analysis)
+            etag = progress_etag(progress)
+        
+        if etag in if_none_match:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(serialize_progress(progress))
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
     
     @action(detail=True, methods=['get'])
     def discrepancies(self, request, pk=None):
@@ -12,10 +12,23 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 import os
+import warnings
 from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _env_int(name, default):
+    """Integer from the environment; an invalid value falls back to the default."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        warnings.warn(f"Invalid {name} value {value!r}, using {default}")
+        return default
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -156,6 +169,38 @@ AZURE_OPENAI_DEPLOYMENT = os.environ.get('AZURE_OPENAI_DEPLOYMENT')
 AZURE_OPENAI_API_VERSION = os.environ.get('AZURE_OPENAI_API_VERSION')
 AZURE_OPENAI_API_KEY = os.environ.get('AZURE_OPENAI_API_KEY')
 
+# Keep-alive connections shared by all Azure OpenAI clients in a process
+LLM_HTTP_MAX_CONNECTIONS = _env_int('LLM_HTTP_MAX_CONNECTIONS', 20)
+
+# Token budget for documents sent to the LLM stages, and chunk size used when trimming them
+LLM_CONTEXT_MAX_TOKENS = _env_int('LLM_CONTEXT_MAX_TOKENS', 30000)
+LLM_CONTEXT_CHUNK_TOKENS = _env_int('LLM_CONTEXT_CHUNK_TOKENS', 400)
+
+# Max number of parallel per-document extraction calls in discrepancy detection
+DISCREPANCY_EXTRACTION_MAX_CONCURRENCY = _env_int('DISCREPANCY_EXTRACTION_MAX_CONCURRENCY', 4)
+
+# LLM response cache: "redis", "sqlite" or "none". Bump LLM_CACHE_VERSION after prompt changes
+LLM_CACHE_BACKEND = os.environ.get('LLM_CACHE_BACKEND', 'none')
+LLM_CACHE_VERSION = os.environ.get('LLM_CACHE_VERSION', '1')
+LLM_CACHE_TTL_SECONDS = _env_int('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600)
+LLM_CACHE_MAX_ENTRIES = _env_int('LLM_CACHE_MAX_ENTRIES', 5000)
+LLM_CACHE_REDIS_URL = os.environ.get('LLM_CACHE_REDIS_URL')
+LLM_CACHE_SQLITE_PATH = os.environ.get('LLM_CACHE_SQLITE_PATH', str(BASE_DIR / 'llm_cache.sqlite3'))
+
 # Azure Document Intelligence Configuration
 AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT = os.environ.get('AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT')
 AZURE_DOCUMENT_INTELLIGENCE_KEY = os.environ.get('AZURE_DOCUMENT_INTELLIGENCE_KEY')
+
+# Uploads above this size are rejected while streaming, before they are stored
+PDF_MAX_UPLOAD_MB = _env_int('PDF_MAX_UPLOAD_MB', 50)
+
+# Max number of documents sent to Document Intelligence in parallel per analysis
+OCR_MAX_CONCURRENCY = _env_int('OCR_MAX_CONCURRENCY', 4)
+
+# Content-hash OCR cache shared across analyses (0 disables the limit)
+OCR_CACHE_TTL_DAYS = _env_int('OCR_CACHE_TTL_DAYS', 30)
+OCR_CACHE_MAX_ENTRIES = _env_int('OCR_CACHE_MAX_ENTRIES', 10000)
+
+# A claim older than this is treated as abandoned by a crashed worker
+OCR_CLAIM_TIMEOUT_SECONDS = _env_int('OCR_CLAIM_TIMEOUT_SECONDS', 600)
+OCR_CLAIM_POLL_SECONDS = _env_int('OCR_CLAIM_POLL_SECONDS', 2)
@@ -1,9 +1,6 @@
-import os
 from dotenv import load_dotenv
-from langchain_openai import AzureChatOpenAI
 from langchain_core.tools import tool
-from langchain.agents import AgentExecutor, create_tool_calling_agent
-from langchain_core.prompts import ChatPromptTemplate
+from .base_data_collector_agent import BaseDataCollectorAgent, get_collector_context
 from .accident_models import AccidentInfo
 from pathlib import Path
 
@@ -12,15 +9,15 @@ load_dotenv()
 
 BASE_DIR = Path(__file__).resolve()
 PROMPT_FILE_PATH = BASE_DIR.parent / "prompts" / "collect_accident_data.txt"
-class AccidentDataCollectorAgent:
+class AccidentDataCollectorAgent(BaseDataCollectorAgent):
     def __init__(self):
-        self.llm = AzureChatOpenAI(
-            azure_deployment=os.environ["AZURE_OPENAI_DEPLOYMENT_NAME"],
-            openai_api_version=os.environ["AZURE_OPENAI_API_VERSION"],
+        super().__init__(
+            prompt_file_path=PROMPT_FILE_PATH,
+            data_model_class=AccidentInfo
         )
 
-        self.collected_data = AccidentInfo()
-        
+    @classmethod
+    def _create_tools(cls):
         @tool
         def save_accident_info(
             accident_date: str = None,
@@ -71,43 +68,44 @@ class AccidentDataCollectorAgent:
                 direct_cause: Bezpośrednia przyczyna urazu
                 indirect_causes: Czynniki które przyczyniły się do wypadku
             """
+            collected_data = get_collector_context().collected_data
 
             if accident_date is not None:
-                self.collected_data.accident_date = accident_date
+                collected_data.accident_date = accident_date
             if accident_time is not None:
-                self.collected_data.accident_time = accident_time
+                collected_data.accident_time = accident_time
             if location is not None:
-                self.collected_data.location = location
+                collected_data.location = location
             if work_start_time is not None:
-                self.collected_data.work_start_time = work_start_time
+                collected_data.work_start_time = work_start_time
             if work_end_time is not None:
-                self.collected_data.work_end_time = work_end_time
+                collected_data.work_end_time = work_end_time
             if injury_type is not None:
-                self.collected_data.injury_type = injury_type
+                collected_data.injury_type = injury_type
             if circumstances is not None:
-                self.collected_data.circumstances = circumstances
+                collected_data.circumstances = circumstances
             if cause is not None:
-                self.collected_data.cause = cause
+                collected_data.cause = cause
             if place_description is not None:
-                self.collected_data.place_description = place_description
+                collected_data.place_description = place_description
             if medical_help is not None:
-                self.collected_data.medical_help = medical_help
+                collected_data.medical_help = medical_help
             if investigation is not None:
-                self.collected_data.investigation = investigation
+                collected_data.investigation = investigation
             if machines_involved is not None:
-                self.collected_data.machines_involved = machines_involved
+                collected_data.machines_involved = machines_involved
             if machine_condition is not None:
-                self.collected_data.machine_condition = machine_condition
+                collected_data.machine_condition = machine_condition
             if proper_use is not None:
-                self.collected_data.proper_use = proper_use
+                collected_data.proper_use = proper_use
             if machine_description is not None:
-                self.collected_data.machine_description = machine_description
+                collected_data.machine_description = machine_description
             if machine_certification is not None:
-                self.collected_data.machine_certification = machine_certification
+                collected_data.machine_certification = machine_certification
             if machine_registry is not None:
-                self.collected_data.machine_registry = machine_registry
+                collected_data.machine_registry = machine_registry
             if witnesses is not None:
-                self.collected_data.witnesses = witnesses
+                collected_data.witnesses = witnesses
 
             return "Data saved successfully"
         
@@ -128,46 +126,15 @@ class AccidentDataCollectorAgent:
                 direct_cause: Bezpośrednia przyczyna urazu (co fizycznie spowodowało obrażenie)
                 indirect_causes: Czynniki które przyczyniły się do wypadku (warunki, okoliczności)
             """
-            self.collected_data.activity_before_accident = activity_before_accident
-            self.collected_data.event_sequence = event_sequence
-            self.collected_data.direct_cause = direct_cause
+            collected_data = get_collector_context().collected_data
+            collected_data.activity_before_accident = activity_before_accident
+            collected_data.event_sequence = event_sequence
+            collected_data.direct_cause = direct_cause
             if indirect_causes:
-                self.collected_data.indirect_causes = indirect_causes
+                collected_data.indirect_causes = indirect_causes
             return "Cause analysis saved successfully"
 
-
-        with open(PROMPT_FILE_PATH, "r", encoding="utf-8") as file:
-            prompt_template = file.read()
-        
-        self.prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    prompt_template
-                ),
-                ("placeholder", "{chat_history}"),
-                ("user", "{input}"),
-                ("placeholder", "{agent_scratchpad}"),
-            ]
-        )
-        
-        self.agent = create_tool_calling_agent(self.llm, [save_accident_info, analyze_accident_causes], self.prompt)
-        self.agent_executor = AgentExecutor(agent=self.agent, tools=[save_accident_info, analyze_accident_causes], verbose=True)
-
-    def collect_data(self, user_input, chat_history=None):
-        """Collect accident data through a conversation"""
-        if chat_history is None:
-            chat_history = []
-            
-        result = self.agent_executor.invoke({
-            "input": user_input,
-            "chat_history": chat_history
-        })
-        return result["output"]
-    
-    def get_collected_data(self):
-        """Returns collected accident data"""
-        return self.collected_data
+        return [save_accident_info, analyze_accident_causes]
 
 
 if __name__ == "__main__":
@@ -1,8 +1,8 @@
-from pydantic import BaseModel, Field
 from typing import Optional
+from .dirty_tracking import DirtyTrackingModel
 
 
-class AccidentInfo(BaseModel):
+class AccidentInfo(DirtyTrackingModel):
     """Structured data model for collecting accident information"""
     
     # PRIORITY 1 - REQUIRED FIELDS
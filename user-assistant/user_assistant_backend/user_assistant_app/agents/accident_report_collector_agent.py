@@ -1,7 +1,7 @@
 import os
 from dotenv import load_dotenv
 from langchain_core.tools import tool
-from .base_data_collector_agent import BaseDataCollectorAgent
+from .base_data_collector_agent import BaseDataCollectorAgent, get_collector_context
 from .accident_report import AccidentReport
 
 
@@ -19,10 +19,9 @@ class AccidentReportCollectorAgent(BaseDataCollectorAgent):
             data_model_class=AccidentReport
         )
     
-    def _create_tools(self):
+    @classmethod
+    def _create_tools(cls):
         """Create tools specific for accident report collection"""
-        
-        agent_self = self
 
         @tool
         def save_accident_info(
@@ -70,42 +69,43 @@ class AccidentReportCollectorAgent(BaseDataCollectorAgent):
                 machine_registry: Czy wpisana do ewidencji środków trwałych
                 witnesses: Dane świadków (imię, nazwisko, adres)
             """
+            collected_data = get_collector_context().collected_data
             if accident_date is not None:
-                agent_self.collected_data.accident_date = accident_date
+                collected_data.accident_date = accident_date
             if accident_time is not None:
-                agent_self.collected_data.accident_time = accident_time
+                collected_data.accident_time = accident_time
             if location is not None:
-                agent_self.collected_data.location = location
+                collected_data.location = location
             if work_start_time is not None:
-                agent_self.collected_data.work_start_time = work_start_time
+                collected_data.work_start_time = work_start_time
             if work_end_time is not None:
-                agent_self.collected_data.work_end_time = work_end_time
+                collected_data.work_end_time = work_end_time
             if injury_type is not None:
-                agent_self.collected_data.injury_type = injury_type
+                collected_data.injury_type = injury_type
             if circumstances is not None:
-                agent_self.collected_data.circumstances = circumstances
+                collected_data.circumstances = circumstances
             if cause is not None:
-                agent_self.collected_data.cause = cause
+                collected_data.cause = cause
             if place_description is not None:
-                agent_self.collected_data.place_description = place_description
+                collected_data.place_description = place_description
             if medical_help is not None:
-                agent_self.collected_data.medical_help = medical_help
+                collected_data.medical_help = medical_help
             if investigation is not None:
-                agent_self.collected_data.investigation = investigation
+                collected_data.investigation = investigation
             if machines_involved is not None:
-                agent_self.collected_data.machines_involved = machines_involved
+                collected_data.machines_involved = machines_involved
             if machine_condition is not None:
-                agent_self.collected_data.machine_condition = machine_condition
+                collected_data.machine_condition = machine_condition
             if proper_use is not None:
-                agent_self.collected_data.proper_use = proper_use
+                collected_data.proper_use = proper_use
             if machine_description is not None:
-                agent_self.collected_data.machine_description = machine_description
+                collected_data.machine_description = machine_description
             if machine_certification is not None:
-                agent_self.collected_data.machine_certification = machine_certification
+                collected_data.machine_certification = machine_certification
             if machine_registry is not None:
-                agent_self.collected_data.machine_registry = machine_registry
+                collected_data.machine_registry = machine_registry
             if witnesses is not None:
-                agent_self.collected_data.witnesses = witnesses
+                collected_data.witnesses = witnesses
             return "Data saved successfully"
         
         @tool  
@@ -127,16 +127,17 @@ class AccidentReportCollectorAgent(BaseDataCollectorAgent):
                 indirect_causes: Czynniki które przyczyniły się do wypadku (warunki, okoliczności)
                 root_cause: Podstawowa przyczyna wypadku (źródło problemu - organizacyjne, proceduralne)
             """
+            collected_data = get_collector_context().collected_data
             if activity_before_accident is not None:
-                agent_self.collected_data.activity_before_accident = activity_before_accident
+                collected_data.activity_before_accident = activity_before_accident
             if event_sequence is not None:
-                agent_self.collected_data.event_sequence = event_sequence
+                collected_data.event_sequence = event_sequence
             if direct_cause is not None:
-                agent_self.collected_data.direct_cause = direct_cause
+                collected_data.direct_cause = direct_cause
             if indirect_causes is not None:
-                agent_self.collected_data.indirect_causes = indirect_causes
+                collected_data.indirect_causes = indirect_causes
             if root_cause is not None:
-                agent_self.collected_data.root_cause = root_cause
+                collected_data.root_cause = root_cause
             return "Cause analysis saved successfully"
         
         return [save_accident_info, analyze_accident_causes]
@@ -1,8 +1,8 @@
-from pydantic import BaseModel, Field
 from typing import Optional
+from .dirty_tracking import DirtyTrackingModel
 
 
-class AccidentStatement(BaseModel):
+class AccidentStatement(DirtyTrackingModel):
     """Structured data model for collecting injured person's statement (wyjaśnienia poszkodowanego)"""
     
     # BASIC EVENT DATA
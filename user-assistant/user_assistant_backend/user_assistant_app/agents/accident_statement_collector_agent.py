@@ -1,7 +1,7 @@
 import os
 from dotenv import load_dotenv
 from langchain_core.tools import tool
-from .base_data_collector_agent import BaseDataCollectorAgent
+from .base_data_collector_agent import BaseDataCollectorAgent, get_collector_context
 from .accident_statement import AccidentStatement
 
 
@@ -18,7 +18,8 @@ class AccidentStatementCollectorAgent(BaseDataCollectorAgent):
             data_model_class=AccidentStatement
         )
     
-    def _create_tools(self):
+    @classmethod
+    def _create_tools(cls):
         """Create tools specific for accident statement collection"""
         
         @tool
@@ -117,49 +118,50 @@ class AccidentStatementCollectorAgent(BaseDataCollectorAgent):
                 witnesses: Dane świadków (imię, nazwisko, adres z kodem pocztowym i krajem)
                 event_sequence: Szczegółowa sekwencja zdarzeń (co robił przed, co się stało, kolejne etapy)
             """
-            self.collected_data.accident_date = accident_date
-            self.collected_data.accident_time = accident_time
-            self.collected_data.location = location
-            self.collected_data.work_start_time = work_start_time
-            self.collected_data.work_end_time = work_end_time
-            self.collected_data.activity_before_accident = activity_before_accident
-            self.collected_data.circumstances = circumstances
-            self.collected_data.cause = cause
-            self.collected_data.place_description = place_description
-            self.collected_data.machines_involved = machines_involved
-            self.collected_data.machine_name_type = machine_name_type
-            self.collected_data.machine_production_date = machine_production_date
-            self.collected_data.machine_condition = machine_condition
-            self.collected_data.proper_use = proper_use
-            self.collected_data.machine_description = machine_description
-            self.collected_data.safety_equipment_used = safety_equipment_used
-            self.collected_data.safety_equipment_types = safety_equipment_types
-            self.collected_data.safety_equipment_condition = safety_equipment_condition
-            self.collected_data.bhp_compliance = bhp_compliance
-            self.collected_data.professional_preparation = professional_preparation
-            self.collected_data.bhp_training = bhp_training
-            self.collected_data.risk_assessment = risk_assessment
-            self.collected_data.risk_mitigation = risk_mitigation
-            self.collected_data.safety_measures = safety_measures
-            self.collected_data.work_solo_or_team = work_solo_or_team
-            self.collected_data.sobriety_state = sobriety_state
-            self.collected_data.sobriety_tested = sobriety_tested
-            self.collected_data.sobriety_tested_by = sobriety_tested_by
-            self.collected_data.investigation_authorities = investigation_authorities
-            self.collected_data.authority_name = authority_name
-            self.collected_data.authority_address = authority_address
-            self.collected_data.authority_case_number = authority_case_number
-            self.collected_data.authority_case_status = authority_case_status
-            self.collected_data.first_aid_provided = first_aid_provided
-            self.collected_data.first_aid_date = first_aid_date
-            self.collected_data.medical_facility = medical_facility
-            self.collected_data.hospitalization_period = hospitalization_period
-            self.collected_data.hospitalization_place = hospitalization_place
-            self.collected_data.diagnosed_injury = diagnosed_injury
-            self.collected_data.work_incapacity_period = work_incapacity_period
-            self.collected_data.sick_leave_on_accident_day = sick_leave_on_accident_day
-            self.collected_data.witnesses = witnesses
-            self.collected_data.event_sequence = event_sequence
+            collected_data = get_collector_context().collected_data
+            collected_data.accident_date = accident_date
+            collected_data.accident_time = accident_time
+            collected_data.location = location
+            collected_data.work_start_time = work_start_time
+            collected_data.work_end_time = work_end_time
+            collected_data.activity_before_accident = activity_before_accident
+            collected_data.circumstances = circumstances
+            collected_data.cause = cause
+            collected_data.place_description = place_description
+            collected_data.machines_involved = machines_involved
+            collected_data.machine_name_type = machine_name_type
+            collected_data.machine_production_date = machine_production_date
+            collected_data.machine_condition = machine_condition
+            collected_data.proper_use = proper_use
+            collected_data.machine_description = machine_description
+            collected_data.safety_equipment_used = safety_equipment_used
+            collected_data.safety_equipment_types = safety_equipment_types
+            collected_data.safety_equipment_condition = safety_equipment_condition
+            collected_data.bhp_compliance = bhp_compliance
+            collected_data.professional_preparation = professional_preparation
+            collected_data.bhp_training = bhp_training
+            collected_data.risk_assessment = risk_assessment
+            collected_data.risk_mitigation = risk_mitigation
+            collected_data.safety_measures = safety_measures
+            collected_data.work_solo_or_team = work_solo_or_team
+            collected_data.sobriety_state = sobriety_state
+            collected_data.sobriety_tested = sobriety_tested
+            collected_data.sobriety_tested_by = sobriety_tested_by
+            collected_data.investigation_authorities = investigation_authorities
+            collected_data.authority_name = authority_name
+            collected_data.authority_address = authority_address
+            collected_data.authority_case_number = authority_case_number
+            collected_data.authority_case_status = authority_case_status
+            collected_data.first_aid_provided = first_aid_provided
+            collected_data.first_aid_date = first_aid_date
+            collected_data.medical_facility = medical_facility
+            collected_data.hospitalization_period = hospitalization_period
+            collected_data.hospitalization_place = hospitalization_place
+            collected_data.diagnosed_injury = diagnosed_injury
+            collected_data.work_incapacity_period = work_incapacity_period
+            collected_data.sick_leave_on_accident_day = sick_leave_on_accident_day
+            collected_data.witnesses = witnesses
+            collected_data.event_sequence = event_sequence
             return "Data saved successfully"
         
         return [save_statement_info]
@@ -1,29 +1,63 @@
-import os
+import threading
+from contextvars import ContextVar
 from dotenv import load_dotenv
-from langchain_openai import AzureChatOpenAI
 from langchain_core.tools import tool
 from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from .llm_client import get_azure_llm
+from .fast_path import parse_answer
 
 
 load_dotenv()
 
 
+class CollectorContext:
+    """Per-call state that the shared agent tools read and write"""
+
+    def __init__(self, collected_data):
+        self.collected_data = collected_data
+
+
+_current_context = ContextVar("collector_context")
+
+
+def get_collector_context():
+    """Returns the context of the agent call currently being executed"""
+    return _current_context.get()
+
+
 class BaseDataCollectorAgent:
-    def __init__(self, prompt_file_path, data_model_class):
-        self.llm = AzureChatOpenAI(
-            azure_deployment=os.environ["AZURE_OPENAI_DEPLOYMENT_NAME"],
-            openai_api_version=os.environ["AZURE_OPENAI_API_VERSION"],
-        )
+    # Executors are stateless and built once per agent type; session data
+    # reaches the tools through CollectorContext instead of closures
+    _agent_executors = {}
+    _question_chains = {}
+    _agent_executors_lock = threading.Lock()
 
+    def __init__(self, prompt_file_path, data_model_class):
         self.collected_data = data_model_class()
+        self.prompt_file_path = prompt_file_path
+        self.agent_executor = self._get_agent_executor(prompt_file_path)
 
-        tools = self._create_tools()
+    @classmethod
+    def _get_agent_executor(cls, prompt_file_path):
+        key = (cls, str(prompt_file_path))
+        with cls._agent_executors_lock:
+            agent_executor = cls._agent_executors.get(key)
+            if agent_executor is None:
+                agent_executor = cls._build_agent_executor(prompt_file_path)
+                cls._agent_executors[key] = agent_executor
+        return agent_executor
+
+    @classmethod
+    def _build_agent_executor(cls, prompt_file_path):
+        llm = get_azure_llm()
+        tools = cls._create_tools()
 
         with open(prompt_file_path, "r", encoding="utf-8") as file:
             prompt_template = file.read()
         
-        self.prompt = ChatPromptTemplate.from_messages(
+        prompt = ChatPromptTemplate.from_messages(
             [
                 (
                     "system",
@@ -35,24 +69,114 @@ class BaseDataCollectorAgent:
             ]
         )
         
-        self.agent = create_tool_calling_agent(self.llm, tools, self.prompt)
-        self.agent_executor = AgentExecutor(agent=self.agent, tools=tools, verbose=True)
+        agent = create_tool_calling_agent(llm, tools, prompt)
+        return AgentExecutor(agent=agent, tools=tools, verbose=True)
+
+    @classmethod
+    def _get_question_chain(cls, prompt_file_path):
+        key = (cls, str(prompt_file_path))
+        with cls._agent_executors_lock:
+            question_chain = cls._question_chains.get(key)
+            if question_chain is None:
+                question_chain = cls._build_question_chain(prompt_file_path)
+                cls._question_chains[key] = question_chain
+        return question_chain
+
+    @classmethod
+    def _build_question_chain(cls, prompt_file_path):
+        """Single LLM call without tools, used once the answer was saved locally"""
+        with open(prompt_file_path, "r", encoding="utf-8") as file:
+            prompt_template = file.read()
 
-    def _create_tools(self):
-        """Override this method in subclasses to define specific tools"""
+        prompt = ChatPromptTemplate.from_messages(
+            [
+                (
+                    "system",
+                    prompt_template
+                ),
+                ("placeholder", "{chat_history}"),
+                ("user", "{input}"),
+                ("system", "{saved_note}"),
+            ]
+        )
+        return prompt | get_azure_llm() | StrOutputParser()
+
+    def _fast_path(self, user_input, chat_history):
+        """Saves a short answer to the last question without the LLM.
+        Returns the question chain input, or None when the agent is needed"""
+        question = next(
+            (m["content"] for m in reversed(chat_history) if m.get("role") == "assistant"), None)
+        values = parse_answer(question, user_input, self.collected_data)
+        if not values:
+            return None
+
+        for field, value in values.items():
+            setattr(self.collected_data, field, value)
+
+        saved = ", ".join(f"{field} = {value}" for field, value in values.items())
+        return {
+            "input": user_input,
+            "chat_history": chat_history,
+            "saved_note": f"Odpowiedź została już zapisana ({saved}). "
+                          f"Nie zapisuj jej ponownie - zadaj kolejne pytanie.",
+        }
+
+    @classmethod
+    def _create_tools(cls):
+        """Override this method in subclasses to define specific tools.
+        Tools update get_collector_context().collected_data"""
         raise NotImplementedError("Subclass must implement _create_tools()")
 
     def collect_data(self, user_input, chat_history=None):
         """Collect accident data through a conversation"""
         if chat_history is None:
             chat_history = []
-            
-        result = self.agent_executor.invoke({
-            "input": user_input,
-            "chat_history": chat_history
-        })
+        
+        question_input = self._fast_path(user_input, chat_history)
+        if question_input:
+            return self._get_question_chain(self.prompt_file_path).invoke(question_input)
+        
+        token = _current_context.set(CollectorContext(self.collected_data))
+        try:
+            result = self.agent_executor.invoke({
+                "input": user_input,
+                "chat_history": chat_history
+            })
+        finally:
+            _current_context.reset(token)
         return result["output"]
     
+    async def astream_data(self, user_input, chat_history=None):
+        """Stream a conversation turn. Yields ("token", text) for each piece of
+        the answer as the model writes it, then ("output", text) with the full answer"""
+        if chat_history is None:
+            chat_history = []
+        
+        question_input = self._fast_path(user_input, chat_history)
+        if question_input:
+            output = ""
+            async for content in self._get_question_chain(self.prompt_file_path).astream(question_input):
+                if content:
+                    output += content
+                    yield "token", content
+            yield "output", output
+            return
+        
+        # Each request runs in its own asyncio task with its own context copy,
+        # so the value is dropped with the task and needs no reset here
+        _current_context.set(CollectorContext(self.collected_data))
+        async for event in self.agent_executor.astream_events(
+            {"input": user_input, "chat_history": chat_history},
+            version="v2",
+        ):
+            if event["event"] == "on_chat_model_stream":
+                # Tool-call chunks carry no content; only the answer text is streamed
+                content = event["data"]["chunk"].content
+                if content:
+                    yield "token", content
+            elif event["event"] == "on_chain_end" and not event["parent_ids"]:
+                yield "output", event["data"]["output"]["output"]
+    
     def get_collected_data(self):
         """Returns collected accident data"""
         return self.collected_data
@@ -60,9 +184,13 @@ class BaseDataCollectorAgent:
     def load_collected_data(self, data_dict):
         """Load previously collected data from dictionary"""
         if data_dict:
-            for key, value in data_dict.items():
-                if hasattr(self.collected_data, key) and value is not None:
-                    setattr(self.collected_data, key, value)
+            data_class = type(self.collected_data)
+            # Stored values are already clean - build the model without validation
+            # and with no fields marked as changed
+            self.collected_data = data_class.model_construct(**{
+                key: value for key, value in data_dict.items()
+                if key in data_class.model_fields and value is not None
+            })
 
 
 
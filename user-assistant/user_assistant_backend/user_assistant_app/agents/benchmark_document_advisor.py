@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from user_assistant_app.agents import document_advisor_agent
+from user_assistant_app.agents.document_advisor_agent import DocumentAdvisorAgent, PROMPT_FILE_PATH
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SAMPLE_DATA = """{
+  "accident_date": "12.03.2024",
+  "accident_time": "08:30",
+  "location": "Warszawa, ul. Prosta 5",
+  "medical_help": "Udzielono pierwszej pomocy, pobyt w szpitalu"
+}"""
+
+SAMPLE_ANSWER = (
+    "Uprzejmie informuję, że będzie konieczne dostarczenie poniższych dokumentów:\n"
+    "1. Kopia karty informacyjnej ze szpitala"
+)
+
+
+class FakeChatModel(GenericFakeChatModel):
+    """Answers instantly, so only the framework overhead is measured"""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def get_fake_llm(*args, **kwargs):
+    return FakeChatModel(messages=iter(lambda: AIMessage(content=SAMPLE_ANSWER), None))
+
+
+def build_executor_path():
+    """The previous implementation: tool-less AgentExecutor with verbose logging"""
+    with open(PROMPT_FILE_PATH, "r", encoding="utf-8") as file:
+        prompt_template = file.read()
+
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", prompt_template),
+            ("placeholder", "{chat_history}"),
+            ("user", "{input}"),
+            ("placeholder", "{agent_scratchpad}"),
+        ]
+    )
+    agent = create_tool_calling_agent(document_advisor_agent.get_azure_llm(), [], prompt)
+    executor = AgentExecutor(agent=agent, tools=[], verbose=True)
+
+    def run(accident_data):
+        return executor.invoke({"input": accident_data, "chat_history": []})["output"]
+    return run
+
+
+def build_chain_path():
+    advisor = DocumentAdvisorAgent()
+    return advisor.generate_document_checklist
+
+
+def measure(run, calls):
+    timings = []
+    devnull = open(os.devnull, "w")
+    stdout = sys.stdout
+    for _ in range(calls):
+        # Verbose executor output would otherwise dominate the measurement on a terminal
+        sys.stdout = devnull
+        try:
+            start = time.perf_counter()
+            run(SAMPLE_DATA)
+            timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            sys.stdout = stdout
+    devnull.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call overhead of DocumentAdvisorAgent: AgentExecutor vs direct chain")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--live", action="store_true", help="call Azure OpenAI instead of a fake model")
+    args = parser.parse_args()
+
+    if not args.live:
+        document_advisor_agent.get_azure_llm = get_fake_llm
+
+    print("=" * 60)
+    print(f"{'wariant':<12}{'wywołań':>10}{'mediana ms':>14}{'p95 ms':>12}")
+    print("=" * 60)
+    for name, build in [("executor", build_executor_path), ("chain", build_chain_path)]:
+        run = build()
+        measure(run, 1 if args.live else 5)
+        timings = sorted(measure(run, args.calls))
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{name:<12}{len(timings):>10}{statistics.median(timings):>14.2f}{p95:>12.2f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+from pydantic import BaseModel, PrivateAttr
+
+
+class DirtyTrackingModel(BaseModel):
+    """Base model that remembers which fields changed since the last save"""
+
+    _dirty_fields: set = PrivateAttr(default_factory=set)
+
+    def __setattr__(self, name, value):
+        if name in type(self).model_fields and getattr(self, name) != value:
+            self._dirty_fields.add(name)
+        super().__setattr__(name, value)
+
+    def get_dirty_fields(self):
+        """Returns {field: new value} for fields changed since the last clear_dirty()"""
+        return {name: getattr(self, name) for name in self._dirty_fields}
+
+    def clear_dirty(self):
+        self._dirty_fields.clear()
@@ -1,8 +1,10 @@
 import os
+import threading
 from dotenv import load_dotenv
-from langchain_openai import AzureChatOpenAI
-from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from .llm_client import get_azure_llm
+from .document_checklist import DocumentChecklist
 
 
 load_dotenv()
@@ -10,16 +12,30 @@ load_dotenv()
 PROMPT_FILE_PATH = os.path.join(os.path.dirname(__file__), "prompts/document_advisor.txt")
 
 class DocumentAdvisorAgent:
+    # The advisor has no tools, so a plain prompt | llm chain is enough - no
+    # AgentExecutor, scratchpad or verbose logging. Chains hold no per-session
+    # state and are built once per prompt
+    _chains = {}
+    _chains_lock = threading.Lock()
+
     def __init__(self, prompt_file_path=PROMPT_FILE_PATH):
-        self.llm = AzureChatOpenAI(
-            azure_deployment=os.environ["AZURE_OPENAI_DEPLOYMENT_NAME"],
-            openai_api_version=os.environ["AZURE_OPENAI_API_VERSION"],
-        )
+        self.prompt_file_path = prompt_file_path
+
+    def _get_chain(self, structured=False):
+        key = (str(self.prompt_file_path), structured)
+        with self._chains_lock:
+            chain = self._chains.get(key)
+            if chain is None:
+                chain = self._build_chain(self.prompt_file_path, structured)
+                self._chains[key] = chain
+        return chain
 
+    @staticmethod
+    def _build_prompt(prompt_file_path):
         with open(prompt_file_path, "r", encoding="utf-8") as file:
             prompt_template = file.read()
-        
-        self.prompt = ChatPromptTemplate.from_messages(
+
+        return ChatPromptTemplate.from_messages(
             [
                 (
                     "system",
@@ -27,27 +43,51 @@ class DocumentAdvisorAgent:
                 ),
                 ("placeholder", "{chat_history}"),
                 ("user", "{input}"),
-                ("placeholder", "{agent_scratchpad}"),
             ]
         )
-        
-        self.agent = create_tool_calling_agent(self.llm, [], self.prompt)
-        self.agent_executor = AgentExecutor(agent=self.agent, tools = [], verbose=True)
+
+    @classmethod
+    def _build_chain(cls, prompt_file_path, structured=False):
+        prompt = cls._build_prompt(prompt_file_path)
+        llm = get_azure_llm()
+        if structured:
+            return prompt | llm.with_structured_output(DocumentChecklist, method="function_calling")
+        return prompt | llm | StrOutputParser()
 
     def generate_document_checklist(self, accident_data, chat_history=None):
         """Generate a document checklist based on accident data"""
         if chat_history is None:
             chat_history = []
-            
-        result = self.agent_executor.invoke({
+
+        return self._get_chain().invoke({
             "input": accident_data,
             "chat_history": chat_history
         })
-        return result["output"]
+
+    def generate_structured_checklist(self, accident_data, chat_history=None):
+        """Generate the checklist as a DocumentChecklist instead of free text"""
+        if chat_history is None:
+            chat_history = []
+
+        return self._get_chain(structured=True).invoke({
+            "input": accident_data,
+            "chat_history": chat_history
+        })
+
+    async def astream_document_checklist(self, accident_data, chat_history=None):
+        """Yields the checklist text chunk by chunk as the LLM produces it"""
+        if chat_history is None:
+            chat_history = []
+
+        async for chunk in self._get_chain().astream({
+            "input": accident_data,
+            "chat_history": chat_history
+        }):
+            if chunk:
+                yield chunk
     
 
 if __name__ == "__main__":
     agent = DocumentAdvisorAgent()
     response = agent.generate_document_checklist("Miałam wypadek")
     print(response)
-    
\ No newline at end of file
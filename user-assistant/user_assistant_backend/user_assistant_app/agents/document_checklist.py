@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class ChecklistDocument(BaseModel):
+    """Single document the injured person has to submit to ZUS"""
+
+    name: str = Field(description="Nazwa dokumentu, np. 'Kopia karty informacyjnej ze szpitala'")
+    reason: str = Field(description="Krótkie uzasadnienie na podstawie danych o wypadku")
+
+
+class DocumentChecklist(BaseModel):
+    """Structured document checklist returned by DocumentAdvisorAgent"""
+
+    introduction: str = Field(description="Uprzejme zdanie wprowadzające do listy dokumentów")
+    documents: List[ChecklistDocument] = Field(default_factory=list)
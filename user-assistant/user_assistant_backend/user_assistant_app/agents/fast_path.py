@@ -0,0 +1,184 @@
+import re
+from datetime import date
+from typing import Optional
+
+
+# Short factual answers are parsed locally when the last assistant question
+# clearly asked for a single kind of value. Anything else goes to the agent.
+
+POLISH_MONTHS = {
+    "stycznia": 1, "lutego": 2, "marca": 3, "kwietnia": 4, "maja": 5, "czerwca": 6,
+    "lipca": 7, "sierpnia": 8, "września": 9, "października": 10, "listopada": 11, "grudnia": 12,
+}
+
+YES_ANSWERS = {"tak", "tak.", "tak,", "owszem", "oczywiście", "zgadza się", "tak, oczywiście"}
+NO_ANSWERS = {"nie", "nie.", "nie,", "nie było", "nie byłem", "nie byłam", "absolutnie nie"}
+
+# (field, stems that must all appear in the question, stems that must not appear).
+# Stems match at the start of a word and every rule names its own field, so a
+# question that only mentions an hour or a date in passing goes to the agent
+QUESTION_RULES = [
+    ("work_start_time", ["któr", "rozpocz", "prac"], []),
+    ("work_end_time", ["któr", "zakończ", "prac"], []),
+    ("accident_date", ["dat", "wypadk"], ["produkcji", "pomoc", "zgłosz", "po wypadku"]),
+    ("accident_date", ["kiedy", "doszło do wypadku"], []),
+    ("accident_date", ["kiedy", "miał miejsce wypadek"], []),
+    ("accident_time", ["godzin", "wypadk"], ["rozpocz", "zakończ", "ile", "po wypadku"]),
+    ("location", ["gdzie", "doszło do wypadku"], []),
+    ("location", ["gdzie", "miał miejsce wypadek"], []),
+    ("location", ["miejsc", "wypadku"], ["opis", "hospitaliz", "świadk"]),
+    ("authority_address", ["adres", "organu"], []),
+    ("first_aid_date", ["którym dniu", "pierwszej pomocy"], []),
+    ("machine_production_date", ["dat", "produkcji"], []),
+    ("machines_involved", ["czy", "maszyn"],
+     ["sprawn", "niesprawn", "instrukcj", "zasad", "atest", "ewidencj", "sposób"]),
+    ("safety_equipment_used", ["czy", "zabezpiecz"], []),
+    ("bhp_compliance", ["czy", "przestrzega", "bhp"], []),
+    ("professional_preparation", ["czy", "przygotowani"], []),
+    ("bhp_training", ["czy", "szkoleni"], []),
+    ("risk_assessment", ["czy", "ocen", "ryzyk"], []),
+    ("safety_measures", ["czy", "asekuracj"], []),
+    ("sobriety_state", ["czy", "nietrzeźw"], []),
+    ("sobriety_tested", ["czy", "badany", "trzeźw"], []),
+    ("investigation_authorities", ["czy", "organy"], []),
+    ("first_aid_provided", ["czy", "pierwszej pomocy"], ["którym dniu"]),
+    ("sick_leave_on_accident_day", ["czy", "zwolnieni"], []),
+]
+
+DATE_FIELDS = {"accident_date", "first_aid_date", "machine_production_date"}
+TIME_FIELDS = {"accident_time", "work_start_time", "work_end_time"}
+ADDRESS_FIELDS = {"location", "authority_address"}
+
+_DATE = r"(\d{1,2})[./-](\d{1,2})[./-](\d{4})|(\d{4})-(\d{1,2})-(\d{1,2})|(\d{1,2})\s+([a-ząćęłńóśźż]+)\s+(\d{4})"
+_TIME = r"(\d{1,2})(?:[:.](\d{2}))?"
+DATE_ANSWER = re.compile(rf"^(?:dnia\s+|w dniu\s+)?(?:{_DATE})(?:\s*r\.?|\s+roku)?$")
+TIME_ANSWER = re.compile(rf"^(?:około\s+|ok\.\s+)?(?:o\s+)?(?:godz(?:inie|\.)?\s+)?{_TIME}(?:\s*(?:rano|godz\.?))?$")
+DATE_TIME_ANSWER = re.compile(
+    r"^(?:dnia\s+)?(?P<date>.+?)(?:\s*r\.?)?[,\s]+(?:około\s+)?(?:o\s+)?(?:godz(?:inie|\.)?\s+)?(?P<time>\d{1,2}[:.]\d{2})$"
+)
+ADDRESS_ANSWER = re.compile(r"\b(?:ul\.|ulica|al\.|aleja|pl\.|os\.)\s*\S+|\b\d{2}-\d{3}\b")
+
+
+def _normalize(text):
+    return " ".join(text.lower().split()).strip(" !")
+
+
+def parse_date(text) -> Optional[str]:
+    match = DATE_ANSWER.match(_normalize(text).rstrip("."))
+    if not match:
+        return None
+    groups = match.groups()
+    try:
+        if groups[0]:
+            value = date(int(groups[2]), int(groups[1]), int(groups[0]))
+        elif groups[3]:
+            value = date(int(groups[3]), int(groups[4]), int(groups[5]))
+        elif groups[7] in POLISH_MONTHS:
+            value = date(int(groups[8]), POLISH_MONTHS[groups[7]], int(groups[6]))
+        else:
+            return None
+    except ValueError:
+        return None
+    return value.strftime("%d.%m.%Y")
+
+
+def parse_time(text) -> Optional[str]:
+    match = TIME_ANSWER.match(_normalize(text).rstrip("."))
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    if hour > 23 or minute > 59:
+        return None
+    return f"{hour:02d}:{minute:02d}"
+
+
+def parse_date_time(text):
+    match = DATE_TIME_ANSWER.match(_normalize(text).rstrip("."))
+    if not match:
+        return None, None
+    return parse_date(match.group("date")), parse_time(match.group("time"))
+
+
+def parse_yes_no(text) -> Optional[bool]:
+    answer = _normalize(text)
+    if answer in YES_ANSWERS:
+        return True
+    if answer in NO_ANSWERS:
+        return False
+    return None
+
+
+def parse_address(text) -> Optional[str]:
+    answer = " ".join(text.split()).strip()
+    # Only short answers that clearly look like an address, never a narrative
+    if len(answer.split()) > 12 or not ADDRESS_ANSWER.search(answer.lower()):
+        return None
+    return answer.rstrip(".")
+
+
+def _has_stem(text, stem):
+    return re.search(r"(?<!\w)" + re.escape(stem), text) is not None
+
+
+def _is_bool_field(data_class, field):
+    return data_class.model_fields[field].annotation in (bool, Optional[bool])
+
+
+def asked_fields(question, collected_data):
+    """Empty fields of collected_data that the assistant's question asks about"""
+    text = _normalize(question)
+    data_class = type(collected_data)
+    fields = []
+    for field, required, excluded in QUESTION_RULES:
+        if field not in data_class.model_fields or field in fields:
+            continue
+        if getattr(collected_data, field) is not None:
+            continue
+        if all(_has_stem(text, stem) for stem in required) and not any(_has_stem(text, stem) for stem in excluded):
+            fields.append(field)
+    return fields
+
+
+def parse_answer(question, answer, collected_data):
+    """Returns {field: value} for a short answer to the last question,
+    or {} when the answer needs the agent"""
+    if not question or not answer or len(answer) > 120:
+        return {}
+
+    fields = asked_fields(question, collected_data)
+    if not fields:
+        return {}
+
+    data_class = type(collected_data)
+    date_fields = [f for f in fields if f in DATE_FIELDS]
+    time_fields = [f for f in fields if f in TIME_FIELDS]
+    bool_fields = [f for f in fields if _is_bool_field(data_class, f)]
+    address_fields = [f for f in fields if f in ADDRESS_FIELDS]
+
+    if len(date_fields) == 1 and len(time_fields) == 1:
+        date_value, time_value = parse_date_time(answer)
+        if date_value and time_value:
+            return {date_fields[0]: date_value, time_fields[0]: time_value}
+
+    # A value is only taken when exactly one asked field can hold it
+    if len(date_fields) == 1:
+        value = parse_date(answer)
+        if value:
+            return {date_fields[0]: value}
+
+    if len(time_fields) == 1:
+        value = parse_time(answer)
+        if value:
+            return {time_fields[0]: value}
+
+    if len(fields) == 1 and bool_fields:
+        value = parse_yes_no(answer)
+        if value is not None:
+            return {bool_fields[0]: value}
+
+    if len(fields) == 1 and address_fields:
+        value = parse_address(answer)
+        if value:
+            return {address_fields[0]: value}
+
+    return {}
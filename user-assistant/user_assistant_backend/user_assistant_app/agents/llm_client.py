@@ -0,0 +1,60 @@
+import os
+import threading
+import httpx
+from dotenv import load_dotenv
+from langchain_openai import AzureChatOpenAI
+
+
+load_dotenv()
+
+# Process-wide clients keyed by configuration, so agents created per request
+# reuse one keep-alive connection pool instead of opening new TLS sessions
+_llm_clients = {}
+_llm_clients_lock = threading.Lock()
+_http_client = None
+_http_async_client = None
+
+
+def _get_limits():
+    max_connections = int(os.environ.get("LLM_HTTP_MAX_CONNECTIONS", 20))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=60,
+    )
+
+
+def _get_http_clients():
+    global _http_client, _http_async_client
+    if _http_client is None:
+        timeout = httpx.Timeout(120.0, connect=10.0)
+        _http_client = httpx.Client(limits=_get_limits(), timeout=timeout)
+        _http_async_client = httpx.AsyncClient(limits=_get_limits(), timeout=timeout)
+    return _http_client, _http_async_client
+
+
+def get_azure_llm(temperature=None, max_tokens=None):
+    """Returns the shared AzureChatOpenAI client for (deployment, temperature, max_tokens)"""
+    deployment = os.environ["AZURE_OPENAI_DEPLOYMENT_NAME"]
+    key = (deployment, temperature, max_tokens)
+
+    with _llm_clients_lock:
+        llm = _llm_clients.get(key)
+        if llm is None:
+            http_client, http_async_client = _get_http_clients()
+            options = {}
+            if temperature is not None:
+                options["temperature"] = temperature
+            if max_tokens is not None:
+                options["max_tokens"] = max_tokens
+
+            llm = AzureChatOpenAI(
+                azure_deployment=deployment,
+                openai_api_version=os.environ["AZURE_OPENAI_API_VERSION"],
+                http_client=http_client,
+                http_async_client=http_async_client,
+                **options,
+            )
+            _llm_clients[key] = llm
+
+    return llm
@@ -0,0 +1,103 @@
+import os
+import json
+import hashlib
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from . import session_store
+from .agents.document_advisor_agent import DocumentAdvisorAgent, PROMPT_FILE_PATH
+
+
+CHECKLIST_TTL_SECONDS = int(os.environ.get("CHECKLIST_TTL_SECONDS", 24 * 3600))
+# Precomputing costs one LLM call per changed collected data, so it is opt-in
+CHECKLIST_PRECOMPUTE = os.environ.get("CHECKLIST_PRECOMPUTE", "0") == "1"
+CHECKLIST_PRECOMPUTE_WORKERS = int(os.environ.get("CHECKLIST_PRECOMPUTE_WORKERS", 2))
+# How long a computation may run before another request is allowed to start it again
+CHECKLIST_LOCK_SECONDS = 120
+
+_precompute_pool = ThreadPoolExecutor(
+    max_workers=CHECKLIST_PRECOMPUTE_WORKERS, thread_name_prefix="checklist")
+
+
+@lru_cache(maxsize=1)
+def get_prompt_version():
+    """Hash of the advisor prompt, so editing the prompt invalidates cached checklists"""
+    with open(PROMPT_FILE_PATH, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()[:12]
+
+
+def canonicalize(collected_data_dict):
+    """Fields without a value are dropped and keys sorted, so the same data
+    loaded from Redis or dumped from the model gives the same fingerprint"""
+    return {field: value for field, value in sorted(collected_data_dict.items()) if value is not None}
+
+
+def fingerprint(collected_data_dict):
+    canonical = json.dumps(canonicalize(collected_data_dict), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def checklist_key(data_type, collected_data_dict, structured=False):
+    # Changed collected data gives a new key, so stale checklists are never
+    # returned and simply expire
+    output_format = "json" if structured else "text"
+    return (f"document_checklist:{data_type}:{output_format}:"
+            f"{get_prompt_version()}:{fingerprint(collected_data_dict)}")
+
+
+def format_accident_data(collected_data_dict):
+    return json.dumps(canonicalize(collected_data_dict), ensure_ascii=False, indent=2)
+
+
+def get_cached_checklist(data_type, collected_data_dict, structured=False):
+    record = session_store.load_checklist(checklist_key(data_type, collected_data_dict, structured))
+    return record["checklist"] if record else None
+
+
+def save_document_checklist(data_type, collected_data_dict, checklist, structured=False):
+    session_store.save_checklist(
+        checklist_key(data_type, collected_data_dict, structured),
+        {"checklist": checklist}, CHECKLIST_TTL_SECONDS)
+
+
+def _generate(data_type, collected_data_dict, structured=False):
+    advisor = DocumentAdvisorAgent()
+    accident_data_json = format_accident_data(collected_data_dict)
+    if structured:
+        checklist = advisor.generate_structured_checklist(accident_data_json).model_dump()
+    else:
+        checklist = advisor.generate_document_checklist(accident_data_json)
+    save_document_checklist(data_type, collected_data_dict, checklist, structured)
+    return checklist
+
+
+def get_document_checklist(data_type, collected_data_dict, structured=False):
+    """Returns the checklist for the collected data, generating it only on a cache miss.
+    Structured checklists are returned as a DocumentChecklist dict"""
+    checklist = get_cached_checklist(data_type, collected_data_dict, structured)
+    if checklist is not None:
+        return checklist
+    return _generate(data_type, collected_data_dict, structured)
+
+
+def _precompute(data_type, collected_data_dict):
+    lock_key = checklist_key(data_type, collected_data_dict) + ":lock"
+    if not session_store.acquire_lock(lock_key, CHECKLIST_LOCK_SECONDS):
+        return
+    try:
+        if get_cached_checklist(data_type, collected_data_dict) is None:
+            _generate(data_type, collected_data_dict)
+    except Exception as e:
+        print(f"Error precomputing document checklist: {e}")
+    finally:
+        session_store.release_lock(lock_key)
+
+
+def schedule_precompute(data_type, collected_data):
+    """Generates the checklist in the background after a collector turn,
+    so the next DocumentAdvisorView request is served from the cache"""
+    if not CHECKLIST_PRECOMPUTE or not session_store.r:
+        return
+    collected_data_dict = collected_data.model_dump()
+    if not canonicalize(collected_data_dict):
+        return
+    _precompute_pool.submit(_precompute, data_type, collected_data_dict)
@@ -0,0 +1,167 @@
+import os
+import json
+import hashlib
+from functools import lru_cache
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from . import session_store
+from .agents.fast_path import parse_answer
+from .agents.llm_client import get_azure_llm
+
+
+# Last N user/assistant turns are sent verbatim, older ones only as a summary
+HISTORY_KEEP_TURNS = int(os.environ.get("HISTORY_KEEP_TURNS", 6))
+# Older turns are folded into the summary in batches to avoid an extra LLM call every turn
+HISTORY_SUMMARY_BATCH_TURNS = int(os.environ.get("HISTORY_SUMMARY_BATCH_TURNS", 3))
+HISTORY_MAX_TOKENS = int(os.environ.get("HISTORY_MAX_TOKENS", 3000))
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        "Streszczasz rozmowę asystenta z osobą zgłaszającą wypadek przy pracy. "
+        "Zaktualizuj dotychczasowe streszczenie o nowe wiadomości. Zachowaj ustalenia, "
+        "wątpliwości i pytania, na które jeszcze nie padła odpowiedź. Pomiń informacje, "
+        "które są już zapisane w zebranych danych. Pisz zwięźle, maksymalnie 10 zdań."
+    ),
+    (
+        "user",
+        "Dotychczasowe streszczenie:\n{summary}\n\n"
+        "Zebrane dane:\n{collected_data}\n\n"
+        "Nowe wiadomości:\n{messages}"
+    ),
+])
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"tiktoken unavailable, estimating tokens from length: {e}")
+        return None
+
+
+def count_tokens(text):
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _message_tokens(message):
+    # A few tokens of per-message overhead on top of the content
+    return count_tokens(message["content"]) + 4
+
+
+def _turn_hash(turn):
+    return hashlib.sha256(json.dumps(turn, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _split_turns(chat_history):
+    return [chat_history[i:i + 2] for i in range(0, len(chat_history), 2)]
+
+
+def _previous_question(turns, index):
+    if index == 0 or turns[index - 1][-1]["role"] != "assistant":
+        return None
+    return turns[index - 1][-1]["content"]
+
+
+def _is_captured(question, turn, collected_data):
+    """A turn is redundant when the user only answered the previous question with
+    values that are already stored, parsed the same way as the agents' fast path"""
+    user_message = turn[0]
+    if collected_data is None or not question or user_message["role"] != "user":
+        return False
+    # Parse against empty data, since the answered fields are filled by now
+    values = parse_answer(question, user_message["content"], type(collected_data)())
+    return bool(values) and all(
+        getattr(collected_data, field) == value for field, value in values.items()
+    )
+
+
+def _format_turns(turns):
+    lines = []
+    for turn in turns:
+        for message in turn:
+            speaker = "Użytkownik" if message["role"] == "user" else "Asystent"
+            lines.append(f"{speaker}: {message['content']}")
+    return "\n".join(lines)
+
+
+def _summarize(summary, turns, collected_data):
+    chain = SUMMARY_PROMPT | get_azure_llm(temperature=0) | StrOutputParser()
+    collected = collected_data.model_dump(exclude_none=True) if collected_data is not None else {}
+    return chain.invoke({
+        "summary": summary or "(brak)",
+        "collected_data": json.dumps(collected, ensure_ascii=False, indent=2),
+        "messages": _format_turns(turns),
+    })
+
+
+def _update_summary(summary_key, older_turns, collected_data):
+    """Returns (summary, older turns not covered by it yet)"""
+    record = session_store.load_summary(summary_key) or {}
+    summary = record.get("summary")
+
+    # Everything up to the last summarized turn is covered; if that turn was
+    # already trimmed from the stored history, all older turns are new
+    uncovered = older_turns
+    last_hash = record.get("last_turn_hash")
+    for i in range(len(older_turns) - 1, -1, -1):
+        if _turn_hash(older_turns[i]) == last_hash:
+            uncovered = older_turns[i + 1:]
+            break
+
+    if len(uncovered) < HISTORY_SUMMARY_BATCH_TURNS:
+        return summary, uncovered
+
+    try:
+        summary = _summarize(summary, uncovered, collected_data)
+    except Exception as e:
+        print(f"Error summarizing chat history: {e}")
+        return summary, uncovered
+
+    session_store.save_summary(summary_key, {
+        "summary": summary,
+        "last_turn_hash": _turn_hash(uncovered[-1]),
+    })
+    return summary, []
+
+
+def build_agent_history(history_key, chat_history, collected_data=None):
+    """Returns the chat history to send to the agent: a rolling summary of older
+    turns plus the most recent turns verbatim, within HISTORY_MAX_TOKENS"""
+    turns = _split_turns(chat_history)
+    recent_turns = turns[-HISTORY_KEEP_TURNS:] if HISTORY_KEEP_TURNS > 0 else []
+    older_turns = turns[:len(turns) - len(recent_turns)]
+
+    summary = None
+    if older_turns:
+        summary, uncovered = _update_summary(history_key + ":summary", older_turns, collected_data)
+        recent_turns = uncovered + recent_turns
+
+    # The latest turn always stays so the agent knows what it just asked
+    start = len(turns) - len(recent_turns)
+    recent_turns = [
+        turn for index, turn in enumerate(recent_turns[:-1], start)
+        if not _is_captured(_previous_question(turns, index), turn, collected_data)
+    ] + recent_turns[-1:]
+
+    budget = HISTORY_MAX_TOKENS
+    summary_messages = []
+    if summary:
+        summary_message = {"role": "system", "content": f"Streszczenie wcześniejszej rozmowy: {summary}"}
+        summary_messages = [summary_message]
+        budget -= _message_tokens(summary_message)
+
+    kept = []
+    for turn in reversed(recent_turns):
+        tokens = sum(_message_tokens(message) for message in turn)
+        if kept and tokens > budget:
+            break
+        kept.insert(0, turn)
+        budget -= tokens
+
+    return summary_messages + [message for turn in kept for message in turn]
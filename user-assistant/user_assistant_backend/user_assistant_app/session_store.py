@@ -0,0 +1,208 @@
+import os
+import json
+import redis
+
+
+MAX_HISTORY_ENTRIES = 100
+SESSION_TTL_SECONDS = int(os.environ.get("SESSION_TTL_SECONDS", 7 * 24 * 3600))
+
+
+def _build_redis_url():
+    redis_url = os.environ.get("AZURE_REDIS_URI") or os.environ.get("REDIS_URL") or ""
+    if not redis_url:
+        host = os.environ.get("REDIS_HOST")
+        port = os.environ.get("REDIS_PORT")
+        db = os.environ.get("REDIS_DB", "0")
+        password = os.environ.get("REDIS_KEY")
+        if host and port:
+            scheme = "rediss" if port == "6380" or os.environ.get("REDIS_SSL", "1") == "1" else "redis"
+            auth = f":{password}@" if password else ""
+            redis_url = f"{scheme}://{auth}{host}:{port}/{db}"
+    return redis_url
+
+
+def _connect():
+    redis_url = _build_redis_url()
+    if not redis_url:
+        print("Redis is not configured, chat sessions will not be stored")
+        return None
+    try:
+        pool = redis.ConnectionPool.from_url(
+            redis_url,
+            decode_responses=True,
+            max_connections=int(os.environ.get("REDIS_MAX_CONNECTIONS", 50)),
+            health_check_interval=30,
+        )
+        client = redis.Redis(connection_pool=pool)
+        client.ping()
+        print("Connected to Redis successfully")
+        return client
+    except Exception as e:
+        print(f"Error connecting to Redis: {e}")
+        return None
+
+
+r = _connect()
+
+
+def _load_legacy_history(history_key):
+    """History used to be stored as one JSON string - convert it to a list in place"""
+    raw_history = r.get(history_key)
+    chat_history = json.loads(raw_history) if raw_history else []
+    pipe = r.pipeline()
+    pipe.delete(history_key)
+    if chat_history:
+        pipe.rpush(history_key, *[json.dumps(m, ensure_ascii=False) for m in chat_history])
+        pipe.expire(history_key, SESSION_TTL_SECONDS)
+    pipe.execute()
+    return chat_history[-MAX_HISTORY_ENTRIES:]
+
+
+def _decode_data(raw_data):
+    return {field: json.loads(value) for field, value in raw_data.items()} or None
+
+
+def _load_legacy_data(data_key):
+    """Collected data used to be stored as one JSON string - convert it to a hash in place"""
+    raw_data = r.get(data_key)
+    collected_data = json.loads(raw_data) if raw_data else {}
+    values = {field: json.dumps(value, ensure_ascii=False)
+              for field, value in collected_data.items() if value is not None}
+    pipe = r.pipeline()
+    pipe.delete(data_key)
+    if values:
+        pipe.hset(data_key, mapping=values)
+        pipe.expire(data_key, SESSION_TTL_SECONDS)
+    pipe.execute()
+    return collected_data or None
+
+
+def load_session(history_key, data_key):
+    """Returns (chat_history, collected_data_dict) read in a single round-trip"""
+    chat_history, collected_data = [], None
+    if not r:
+        return chat_history, collected_data
+    try:
+        pipe = r.pipeline(transaction=False)
+        pipe.lrange(history_key, -MAX_HISTORY_ENTRIES, -1)
+        pipe.hgetall(data_key)
+        raw_history, raw_data = pipe.execute(raise_on_error=False)
+
+        if isinstance(raw_history, redis.ResponseError):
+            chat_history = _load_legacy_history(history_key)
+        else:
+            chat_history = [json.loads(m) for m in raw_history]
+
+        if isinstance(raw_data, redis.ResponseError):
+            collected_data = _load_legacy_data(data_key)
+        else:
+            collected_data = _decode_data(raw_data)
+    except Exception as e:
+        print(f"Error reading session from Redis: {e}")
+    return chat_history, collected_data
+
+
+def load_data(data_key):
+    collected_data = None
+    try:
+        if r:
+            try:
+                collected_data = _decode_data(r.hgetall(data_key))
+            except redis.ResponseError:
+                collected_data = _load_legacy_data(data_key)
+    except Exception as e:
+        print(f"Error reading collected data from Redis: {e}")
+    return collected_data
+
+
+def _queue_data_changes(pipe, data_key, collected_data):
+    """Queues HSET/HDEL for the fields changed during this turn only, so
+    parallel turns on the same session don't overwrite each other's fields"""
+    changes = collected_data.get_dirty_fields()
+    if not changes:
+        return
+    values = {field: json.dumps(value, ensure_ascii=False)
+              for field, value in changes.items() if value is not None}
+    cleared = [field for field, value in changes.items() if value is None]
+    if values:
+        pipe.hset(data_key, mapping=values)
+    if cleared:
+        pipe.hdel(data_key, *cleared)
+    pipe.expire(data_key, SESSION_TTL_SECONDS)
+
+
+def save_turn(history_key, data_key, user_input, agent_response, collected_data):
+    """Appends the turn to the history and stores changed collected data in a single round-trip"""
+    if not r:
+        return
+    try:
+        pipe = r.pipeline(transaction=False)
+        pipe.rpush(
+            history_key,
+            json.dumps({"role": "user", "content": user_input}, ensure_ascii=False),
+            json.dumps({"role": "assistant", "content": agent_response}, ensure_ascii=False),
+        )
+        pipe.ltrim(history_key, -MAX_HISTORY_ENTRIES, -1)
+        pipe.expire(history_key, SESSION_TTL_SECONDS)
+        _queue_data_changes(pipe, data_key, collected_data)
+        pipe.execute()
+        collected_data.clear_dirty()
+    except Exception as e:
+        print(f"Error saving session to Redis: {e}")
+
+
+def load_summary(summary_key):
+    try:
+        if r:
+            raw_summary = r.get(summary_key)
+            if raw_summary:
+                return json.loads(raw_summary)
+    except Exception as e:
+        print(f"Error reading history summary from Redis: {e}")
+    return None
+
+
+def save_summary(summary_key, summary):
+    try:
+        if r:
+            r.set(summary_key, json.dumps(summary, ensure_ascii=False), ex=SESSION_TTL_SECONDS)
+    except Exception as e:
+        print(f"Error saving history summary to Redis: {e}")
+
+
+def load_checklist(checklist_key):
+    try:
+        if r:
+            raw_checklist = r.get(checklist_key)
+            if raw_checklist:
+                return json.loads(raw_checklist)
+    except Exception as e:
+        print(f"Error reading document checklist from Redis: {e}")
+    return None
+
+
+def save_checklist(checklist_key, checklist, ttl):
+    try:
+        if r:
+            r.set(checklist_key, json.dumps(checklist, ensure_ascii=False), ex=ttl)
+    except Exception as e:
+        print(f"Error saving document checklist to Redis: {e}")
+
+
+def acquire_lock(lock_key, ttl):
+    """Returns True when the lock was taken; without Redis there is nothing to share"""
+    if not r:
+        return True
+    try:
+        return bool(r.set(lock_key, "1", nx=True, ex=ttl))
+    except Exception as e:
+        print(f"Error taking lock in Redis: {e}")
+        return True
+
+
+def release_lock(lock_key):
+    try:
+        if r:
+            r.delete(lock_key)
+    except Exception as e:
+        print(f"Error releasing lock in Redis: {e}")
@@ -1,3 +1,81 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .agents.accident_models import AccidentInfo
+from .agents.fast_path import parse_answer
+from .history_manager import build_agent_history
+
+
+class ParseAnswerTests(SimpleTestCase):
+    def parse(self, question, answer):
+        return parse_answer(question, answer, AccidentInfo())
+
+    def test_accident_date_and_time(self):
+        question = "Kiedy dokładnie doszło do wypadku? Proszę podać datę i godzinę."
+        self.assertEqual(
+            self.parse(question, "14.03.2024, 8:30"),
+            {"accident_date": "14.03.2024", "accident_time": "08:30"},
+        )
+
+    def test_work_start_time(self):
+        question = "O której godzinie planowałeś rozpocząć pracę w dniu wypadku?"
+        self.assertEqual(self.parse(question, "7:00"), {"work_start_time": "07:00"})
+
+    def test_accident_location(self):
+        question = "Gdzie doszło do wypadku?"
+        self.assertEqual(self.parse(question, "ul. Prosta 5, 00-001 Warszawa"),
+                         {"location": "ul. Prosta 5, 00-001 Warszawa"})
+
+    def test_hours_per_day_is_not_accident_time(self):
+        self.assertEqual(self.parse("Ile godzin dziennie pracujesz?", "8"), {})
+
+    def test_hours_after_accident_is_not_accident_time(self):
+        self.assertEqual(self.parse("Ile godzin po wypadku zgłosiłeś się do lekarza?", "2"), {})
+
+    def test_report_date_is_not_accident_date(self):
+        question = "Czy masz jakieś dodatkowe informacje, np. kiedy zgłosiłeś wypadek pracodawcy?"
+        self.assertEqual(self.parse(question, "14.03.2024"), {})
+
+    def test_additional_information_is_not_a_date_question(self):
+        self.assertEqual(self.parse("Czy masz jakieś dodatkowe informacje?", "14.03.2024"), {})
+
+    def test_workplace_is_not_accident_location(self):
+        self.assertEqual(self.parse("Gdzie pracujesz?", "ul. Prosta 5"), {})
+
+    def test_employment_start_is_not_work_start_time(self):
+        self.assertEqual(self.parse("Kiedy rozpocząłeś pracę w tej firmie?", "8"), {})
+
+    def test_long_answer_goes_to_agent(self):
+        question = "Gdzie doszło do wypadku?"
+        answer = "Na hali produkcyjnej przy ul. Prostej 5, " + "obok maszyny " * 10
+        self.assertEqual(self.parse(question, answer), {})
+
+
+class AgentHistoryTests(SimpleTestCase):
+    def history(self, *turns):
+        return [
+            {"role": role, "content": content}
+            for user, assistant in turns
+            for role, content in (("user", user), ("assistant", assistant))
+        ]
+
+    def test_answer_already_stored_is_dropped(self):
+        chat_history = self.history(
+            ("Miałem wypadek", "Kiedy dokładnie doszło do wypadku?"),
+            ("dnia 14 marca 2024 r.", "Gdzie doszło do wypadku?"),
+            ("ul. Prosta 5, Warszawa.", "Co robiłeś w chwili wypadku?"),
+        )
+        collected = AccidentInfo(accident_date="14.03.2024", location="ul. Prosta 5, Warszawa")
+        contents = [m["content"] for m in build_agent_history("test", chat_history, collected)]
+        self.assertNotIn("dnia 14 marca 2024 r.", contents)
+        self.assertIn("Miałem wypadek", contents)
+        self.assertIn("ul. Prosta 5, Warszawa.", contents)
+
+    def test_answer_not_stored_is_kept(self):
+        chat_history = self.history(
+            ("Miałem wypadek", "Kiedy dokładnie doszło do wypadku?"),
+            ("dnia 14 marca 2024 r.", "Gdzie doszło do wypadku?"),
+            ("ul. Prosta 5", "Co robiłeś w chwili wypadku?"),
+        )
+        collected = AccidentInfo(accident_date="15.03.2024")
+        contents = [m["content"] for m in build_agent_history("test", chat_history, collected)]
+        self.assertIn("dnia 14 marca 2024 r.", contents)
@@ -8,5 +8,10 @@ urlpatterns = [
     
     path('accident-statement-collector/', views.AccidentStatementCollectorView.as_view(), name="accident_statement_collector"),
     path('accident-report-collector/', views.AccidentReportCollectorView.as_view(), name="accident_report_collector"),
+
+    path('accident-data-collector/stream/', views.accident_data_collector_stream, name="accident_data_collector_stream"),
+    path('accident-statement-collector/stream/', views.accident_statement_collector_stream, name="accident_statement_collector_stream"),
+    path('accident-report-collector/stream/', views.accident_report_collector_stream, name="accident_report_collector_stream"),
     path('document-advisor/', views.DocumentAdvisorView.as_view(), name="document_advisor"),
+    path('document-advisor/stream/', views.document_advisor_stream, name="document_advisor_stream"),
 ]
\ No newline at end of file
@@ -1,37 +1,25 @@
 from django.shortcuts import render
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.conf import settings
 from langchain_community.chat_message_histories import RedisChatMessageHistory
 from langchain.memory import ConversationBufferWindowMemory
 from .agents.accident_data_collector_agent import  AccidentDataCollectorAgent
+from .agents.accident_statement_collector_agent import AccidentStatementCollectorAgent
+from .agents.accident_report_collector_agent import AccidentReportCollectorAgent
+from . import session_store
 from .agents.document_advisor_agent import DocumentAdvisorAgent
-import os
-import redis
+from . import checklist_cache
+from .checklist_cache import get_document_checklist, schedule_precompute
+from .history_manager import build_agent_history
 import json
 
 MVP_SESSION_ID = "mvp_single_user_session"
 
-redis_url = os.environ.get("AZURE_REDIS_URI") or os.environ.get("REDIS_URL") or ""
-if not redis_url:
-    host = os.environ.get("REDIS_HOST")
-    port = os.environ.get("REDIS_PORT")
-    db = os.environ.get("REDIS_DB", "0")
-    password = os.environ.get("REDIS_KEY")
-    if host and port:
-        scheme = "rediss" if port == "6380" or os.environ.get("REDIS_SSL", "1") == "1" else "redis"
-        auth = f":{password}@" if password else ""
-        redis_url = f"{scheme}://{auth}{host}:{port}/{db}"
-        print(f"Connecting to Redis at {redis_url}")
-        try:
-            r = redis.Redis.from_url(redis_url, decode_responses=True) if redis_url else None
-            if redis:
-                r.ping()
-                print("Connected to Redis successfully")
-        except Exception as e:
-            print(f"Error connecting to Redis: {e}")
-            r = None
-
 class SampleView(APIView):
     def get(self, request):
         return Response({"message": "OK"})
@@ -54,12 +42,18 @@ class AccidentDataCollectorView(APIView):
         user_input = request.data.get("input", "")
         session_id = request.data.get("session_id") or MVP_SESSION_ID
 
-        chat_history = get_redis_history(self.REDIS_HISTORY_KEY + session_id)
+        chat_history, collected_data_dict = session_store.load_session(
+            self.REDIS_HISTORY_KEY + session_id, self.REDIS_DATA_KEY + session_id)
 
         agent = AccidentDataCollectorAgent()
 
+        if collected_data_dict:
+            agent.load_collected_data(collected_data_dict)
+        agent_history = build_agent_history(
+            self.REDIS_HISTORY_KEY + session_id, chat_history, agent.get_collected_data())
+
         try:
-            response = agent.collect_data(user_input, chat_history)
+            response = agent.collect_data(user_input, agent_history)
         except TypeError:
             response = agent.collect_data(user_input)
         except Exception as e:
@@ -67,8 +61,10 @@ class AccidentDataCollectorView(APIView):
             return Response({"error": "Internal server error"}, status=500)
         
         resp_text = response if isinstance(response, str) else json.dumps(response, ensure_ascii=False)
-        set_redis_history(self.REDIS_HISTORY_KEY+session_id, user_input, resp_text, chat_history)
-        set_redis_data(self.REDIS_DATA_KEY+session_id, agent.get_collected_data())
+        session_store.save_turn(
+            self.REDIS_HISTORY_KEY + session_id, self.REDIS_DATA_KEY + session_id,
+            user_input, resp_text, agent.get_collected_data())
+        schedule_precompute("accident", agent.get_collected_data())
 
         return Response({
             "response": response, 
@@ -84,23 +80,27 @@ class AccidentStatementCollectorView(APIView):
         user_input = request.data.get("input", "")
         session_id = request.data.get("session_id") or MVP_SESSION_ID
 
-        chat_history = get_redis_history(self.REDIS_HISTORY_KEY + session_id)
-        collected_data_dict = get_redis_data(self.REDIS_DATA_KEY + session_id)
+        chat_history, collected_data_dict = session_store.load_session(
+            self.REDIS_HISTORY_KEY + session_id, self.REDIS_DATA_KEY + session_id)
 
         agent = AccidentStatementCollectorAgent()
 
         if collected_data_dict:
             agent.load_collected_data(collected_data_dict)
+        agent_history = build_agent_history(
+            self.REDIS_HISTORY_KEY + session_id, chat_history, agent.get_collected_data())
         try:
-            response = agent.collect_data(user_input, chat_history)
+            response = agent.collect_data(user_input, agent_history)
             collected_data = agent.get_collected_data()
 
         except Exception as e:
             print(f"Error during agent execution: {e}")
             return Response({"error": "Internal server error"}, status=500)
         resp_text = response if isinstance(response, str) else json.dumps(response, ensure_ascii=False)
-        set_redis_history(self.REDIS_HISTORY_KEY+session_id, user_input, resp_text, chat_history)
-        set_redis_data(self.REDIS_DATA_KEY+session_id, collected_data)
+        session_store.save_turn(
+            self.REDIS_HISTORY_KEY + session_id, self.REDIS_DATA_KEY + session_id,
+            user_input, resp_text, collected_data)
+        schedule_precompute("statement", collected_data)
         return Response({
             "response": response, 
             "session_id": session_id,
@@ -115,16 +115,18 @@ class AccidentReportCollectorView(APIView):
         user_input = request.data.get("input", "")
         session_id = request.data.get("session_id") or MVP_SESSION_ID
 
-        chat_history = get_redis_history(self.REDIS_HISTORY_KEY + session_id)
-        collected_data_dict = get_redis_data(self.REDIS_DATA_KEY + session_id)
+        chat_history, collected_data_dict = session_store.load_session(
+            self.REDIS_HISTORY_KEY + session_id, self.REDIS_DATA_KEY + session_id)
 
         agent = AccidentReportCollectorAgent()
 
         if collected_data_dict:
             agent.load_collected_data(collected_data_dict)
+        agent_history = build_agent_history(
+            self.REDIS_HISTORY_KEY + session_id, chat_history, agent.get_collected_data())
 
         try:
-            response = agent.collect_data(user_input, chat_history)
+            response = agent.collect_data(user_input, agent_history)
             collected_data = agent.get_collected_data()
 
         except Exception as e:
@@ -132,37 +134,124 @@ class AccidentReportCollectorView(APIView):
             return Response({"error": "Internal server error"}, status=500)
         
         resp_text = response if isinstance(response, str) else json.dumps(response, ensure_ascii=False)
-        set_redis_history(self.REDIS_HISTORY_KEY+session_id, user_input, resp_text, chat_history)
-        set_redis_data(self.REDIS_DATA_KEY+session_id, collected_data)
+        session_store.save_turn(
+            self.REDIS_HISTORY_KEY + session_id, self.REDIS_DATA_KEY + session_id,
+            user_input, resp_text, collected_data)
+        schedule_precompute("report", collected_data)
         return Response({
             "response": response, 
             "session_id": session_id,
             "collected_data": collected_data.model_dump()})
 
 
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_collector_turn(agent, user_input, session_id, history_key, data_key, data_type):
+    """Streams answer tokens as SSE events, then saves history and collected data
+    and sends them in a final "done" event"""
+    chat_history, collected_data_dict = await sync_to_async(session_store.load_session)(history_key, data_key)
+    if collected_data_dict:
+        agent.load_collected_data(collected_data_dict)
+    agent_history = await sync_to_async(build_agent_history)(
+        history_key, chat_history, agent.get_collected_data())
+
+    response = ""
+    try:
+        async for kind, content in agent.astream_data(user_input, agent_history):
+            if kind == "token":
+                yield sse_event("token", {"content": content})
+            else:
+                response = content
+    except Exception as e:
+        print(f"Error during agent execution: {e}")
+        yield sse_event("error", {"error": "Internal server error"})
+        return
+
+    # Tool calls updated agent.collected_data during the turn - persist it once at the end
+    collected_data = agent.get_collected_data()
+    resp_text = response if isinstance(response, str) else json.dumps(response, ensure_ascii=False)
+    await sync_to_async(session_store.save_turn)(history_key, data_key, user_input, resp_text, collected_data)
+    schedule_precompute(data_type, collected_data)
+
+    yield sse_event("done", {
+        "response": response,
+        "session_id": session_id,
+        "collected_data": collected_data.model_dump()})
+
+
+def collector_stream_view(agent_class, history_prefix, data_prefix, data_type):
+    """Async view streaming a collector agent's answer over Server-Sent Events"""
+
+    @csrf_exempt
+    @require_POST
+    async def view(request):
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+        user_input = data.get("input", "")
+        session_id = data.get("session_id") or MVP_SESSION_ID
+
+        response = StreamingHttpResponse(
+            stream_collector_turn(
+                agent_class(), user_input, session_id,
+                history_prefix + session_id, data_prefix + session_id, data_type),
+            content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    return view
+
+
+accident_data_collector_stream = collector_stream_view(
+    AccidentDataCollectorAgent,
+    AccidentDataCollectorView.REDIS_HISTORY_KEY,
+    AccidentDataCollectorView.REDIS_DATA_KEY,
+    "accident")
+
+accident_statement_collector_stream = collector_stream_view(
+    AccidentStatementCollectorAgent,
+    AccidentStatementCollectorView.REDIS_HISTORY_KEY,
+    AccidentStatementCollectorView.REDIS_DATA_KEY,
+    "statement")
+
+accident_report_collector_stream = collector_stream_view(
+    AccidentReportCollectorAgent,
+    AccidentReportCollectorView.REDIS_HISTORY_KEY,
+    AccidentReportCollectorView.REDIS_DATA_KEY,
+    "report")
+
+
+def select_document_data(data_type, session_id):
+    """Returns (data_type, redis_data_key) for the collected data the checklist is built from"""
+    # Select appropriate Redis key based on data_type
+    if data_type == "report":
+        return data_type, f"report_collected_data:{session_id}"
+    elif data_type == "statement":
+        return data_type, f"statement_collected_data:{session_id}"
+    return "accident", f"accident_collected_data:{session_id}"
+
+
 class DocumentAdvisorView(APIView):
 
     def post(self, request):
         session_id = request.data.get("session_id") or MVP_SESSION_ID
-        data_type = request.data.get("data_type", "accident")  # "accident", "report", or "statement"
-        
-        # Select appropriate Redis key based on data_type
-        if data_type == "report":
-            redis_data_key = f"report_collected_data:{session_id}"
-        elif data_type == "statement":
-            redis_data_key = f"statement_collected_data:{session_id}"
-        else:
-            redis_data_key = f"accident_collected_data:{session_id}"
+        # "accident", "report", or "statement"
+        data_type, redis_data_key = select_document_data(request.data.get("data_type", "accident"), session_id)
+        # "json" returns the checklist as {"introduction", "documents": [{"name", "reason"}]}
+        structured = request.data.get("format") == "json"
         
-        collected_data_dict = get_redis_data(redis_data_key)
+        collected_data_dict = session_store.load_data(redis_data_key)
         
         if not collected_data_dict:
             return Response({"error": f"No collected data found for {data_type}. Please complete data collection first."}, status=404)
 
         try:
-            advisor = DocumentAdvisorAgent()
-            accident_data_json = json.dumps(collected_data_dict, ensure_ascii=False, indent=2)
-            document_checklist = advisor.generate_document_checklist(accident_data_json)
+            document_checklist = get_document_checklist(data_type, collected_data_dict, structured)
             
             return Response({
                 "document_checklist": document_checklist,
@@ -174,47 +263,51 @@ class DocumentAdvisorView(APIView):
             return Response({"error": "Error generating document checklist"}, status=500)
 
 
-def get_redis_history(history_key):
-    chat_history = []
-    try:
-        if r:
-            raw_history = r.get(history_key)
-            if raw_history:
-                chat_history = json.loads(raw_history)
-    except Exception as e:
-        print(f"Error reading chat history from Redis: {e}")
-        chat_history = []
-    return chat_history
-
-def set_redis_history(history_key, user_input, agent_response, chat_history):
-    try:
-        chat_history.append({"role": "user", "content": user_input})
-        chat_history.append({"role": "assistant", "content": agent_response})
-
-        MAX_ENTRIES = 100
-        if len(chat_history) > MAX_ENTRIES:
-            chat_history = chat_history[-MAX_ENTRIES:]
+async def stream_document_checklist(data_type, collected_data_dict, session_id):
+    cached = await sync_to_async(checklist_cache.get_cached_checklist)(data_type, collected_data_dict)
+    if cached is not None:
+        yield sse_event("token", {"content": cached})
+        document_checklist = cached
+    else:
+        document_checklist = ""
+        try:
+            advisor = DocumentAdvisorAgent()
+            accident_data_json = checklist_cache.format_accident_data(collected_data_dict)
+            async for content in advisor.astream_document_checklist(accident_data_json):
+                document_checklist += content
+                yield sse_event("token", {"content": content})
+        except Exception as e:
+            print(f"Error generating document checklist: {e}")
+            yield sse_event("error", {"error": "Error generating document checklist"})
+            return
+        await sync_to_async(checklist_cache.save_document_checklist)(
+            data_type, collected_data_dict, document_checklist)
 
-        if r:
-            r.set(history_key, json.dumps(chat_history, ensure_ascii=False))
-    except Exception as e:
-        print(f"Error saving chat history to Redis: {e}")
+    yield sse_event("done", {
+        "document_checklist": document_checklist,
+        "session_id": session_id,
+        "data_type": data_type})
 
-def set_redis_data(data_key, collected_data):
-    try:
-        if r:
-            r.set(data_key, json.dumps(collected_data.__dict__, ensure_ascii=False))
-    except Exception as e:
-        print(f"Error saving collected data to Redis: {e}")
 
-def get_redis_data(data_key):
-    collected_data = None
+@csrf_exempt
+@require_POST
+async def document_advisor_stream(request):
+    """Streams the document checklist over Server-Sent Events"""
     try:
-        if r:
-            raw_data = r.get(data_key)
-            if raw_data:
-                collected_data_dict = json.loads(raw_data)
-                collected_data = collected_data_dict
-    except Exception as e:
-        print(f"Error reading collected data from Redis: {e}")
-    return collected_data
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    session_id = data.get("session_id") or MVP_SESSION_ID
+    data_type, redis_data_key = select_document_data(data.get("data_type", "accident"), session_id)
+
+    collected_data_dict = await sync_to_async(session_store.load_data)(redis_data_key)
+    if not collected_data_dict:
+        return JsonResponse({"error": f"No collected data found for {data_type}. Please complete data collection first."}, status=404)
+
+    response = StreamingHttpResponse(
+        stream_document_checklist(data_type, collected_data_dict, session_id),
+        content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response